@@ -2,30 +2,108 @@
 .. include:: ../README.md
 """
 
-from .exceptions import StreamMagicError, StreamMagicConnectionError
-from .models import (
-    Info,
-    PlayStateMetadata,
-    PlayState,
-    State,
-    Source,
-    NowPlaying,
-    ControlBusMode,
-    TransportControl,
-    RepeatMode,
-    ShuffleMode,
-    EQBand,
-    UserEQ,
-    EQFilterType,
-    Audio,
-    EQ_PRESETS,
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+from .exceptions import (
+    StreamMagicError,
+    StreamMagicConnectionError,
+    StreamMagicResponseError,
 )
-from .stream_magic import StreamMagicClient
+
+if TYPE_CHECKING:
+    from .batch import StreamMagicBatch
+    from .capabilities import CapabilityRegistry
+    from .diagnostics import Diagnostics
+    from .discovery import DeviceRegistry, DiscoveredDevice, async_discover
+    from .fleet import StreamMagicFleet
+    from .history import HistoryEntry, StateHistory
+    from .models import (
+        Info,
+        PlayStateMetadata,
+        PlayState,
+        State,
+        Source,
+        NowPlaying,
+        ControlBusMode,
+        TransportControl,
+        RepeatMode,
+        ShuffleMode,
+        EQBand,
+        UserEQ,
+        EQFilterType,
+        Audio,
+        EQ_PRESETS,
+        DEFAULT_EQ_BANDS,
+        HealthState,
+        HistoryKind,
+        CommandPriority,
+        Scene,
+    )
+    from .scheduler import CommandScheduler, request_priority
+    from .shared_state import DeviceRecord, StateTable
+    from .snapshot import DeviceSnapshot
+    from .stream_magic import StreamMagicClient
+    from .threaded import StreamMagicThreadedClient
+    from .wire import WireCounter, WireStats
+    from .zone import BaseZone, StreamMagicZone
+
+# Submodules are imported on first attribute access so that importing the
+# package does not pull in aiohttp or build the models until they are used.
+# The eq module needs the optional numpy and is imported from aiostreammagic.eq.
+_LAZY_IMPORTS: dict[str, tuple[str, ...]] = {
+    "batch": ("StreamMagicBatch",),
+    "capabilities": ("CapabilityRegistry",),
+    "diagnostics": ("Diagnostics",),
+    "discovery": ("DeviceRegistry", "DiscoveredDevice", "async_discover"),
+    "fleet": ("StreamMagicFleet",),
+    "history": ("HistoryEntry", "StateHistory"),
+    "models": (
+        "Info",
+        "PlayStateMetadata",
+        "PlayState",
+        "State",
+        "Source",
+        "NowPlaying",
+        "ControlBusMode",
+        "TransportControl",
+        "RepeatMode",
+        "ShuffleMode",
+        "EQBand",
+        "UserEQ",
+        "EQFilterType",
+        "Audio",
+        "EQ_PRESETS",
+        "DEFAULT_EQ_BANDS",
+        "HealthState",
+        "HistoryKind",
+        "CommandPriority",
+        "Scene",
+    ),
+    "scheduler": ("CommandScheduler", "request_priority"),
+    "shared_state": ("DeviceRecord", "StateTable"),
+    "snapshot": ("DeviceSnapshot",),
+    "stream_magic": ("StreamMagicClient",),
+    "threaded": ("StreamMagicThreadedClient",),
+    "wire": ("WireCounter", "WireStats"),
+    "zone": ("BaseZone", "StreamMagicZone"),
+}
+_LAZY_MODULES = {
+    name: module for module, names in _LAZY_IMPORTS.items() for name in names
+}
 
 __all__ = [
     "StreamMagicClient",
+    "BaseZone",
+    "StreamMagicZone",
+    "StreamMagicFleet",
+    "StreamMagicThreadedClient",
     "StreamMagicError",
     "StreamMagicConnectionError",
+    "StreamMagicResponseError",
+    "DeviceRegistry",
+    "DiscoveredDevice",
+    "async_discover",
     "Info",
     "Source",
     "State",
@@ -41,4 +119,35 @@ __all__ = [
     "EQFilterType",
     "Audio",
     "EQ_PRESETS",
+    "DEFAULT_EQ_BANDS",
+    "HealthState",
+    "CommandPriority",
+    "CommandScheduler",
+    "request_priority",
+    "StreamMagicBatch",
+    "StateTable",
+    "DeviceSnapshot",
+    "StateHistory",
+    "Diagnostics",
+    "WireStats",
+    "WireCounter",
+    "CapabilityRegistry",
+    "HistoryEntry",
+    "HistoryKind",
+    "DeviceRecord",
+    "Scene",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import public names from their submodule on first access."""
+    module = _LAZY_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,52 @@
+"""Pipelined batches of StreamMagic requests."""
+
+from typing import Any, Optional, TYPE_CHECKING
+
+from aiostreammagic.models import CommandPriority
+
+if TYPE_CHECKING:
+    from aiostreammagic.stream_magic import StreamMagicClient
+
+
+class StreamMagicBatch:
+    """Collect requests and send them back-to-back when the block exits."""
+
+    def __init__(
+        self, client: "StreamMagicClient", priority: Optional[CommandPriority] = None
+    ) -> None:
+        self.client = client
+        self.priority = priority
+        self.commands: list[
+            tuple[str, Optional[dict[str, str | int | float | bool]]]
+        ] = []
+        self.results: list[Any] = []
+
+    def add(
+        self, path: str, params: Optional[dict[str, str | int | float | bool]] = None
+    ) -> int:
+        """Add a request to the batch and return its index in the results."""
+        self.commands.append((path, params))
+        return len(self.commands) - 1
+
+    @property
+    def errors(self) -> list[BaseException]:
+        """Return the errors raised by requests in the batch."""
+        return [result for result in self.results if isinstance(result, BaseException)]
+
+    async def execute(self) -> list[Any]:
+        """Send the collected requests and return their results."""
+        commands, self.commands = self.commands, []
+        self.results = await self.client.execute_many(commands, self.priority)
+        return self.results
+
+    async def __aenter__(self) -> "StreamMagicBatch":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: object | None,
+    ) -> None:
+        if exc_type is None:
+            await self.execute()
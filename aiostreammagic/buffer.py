@@ -0,0 +1,102 @@
+"""Buffering of StreamMagic requests issued while the client is reconnecting."""
+
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Optional
+
+from aiostreammagic.exceptions import StreamMagicConnectionError
+from aiostreammagic.models import RepeatMode, ShuffleMode
+
+# Parameters whose requests are relative or only update part of a setting, so
+# a later request does not supersede an earlier one.
+UNCOLLAPSIBLE_PARAMS = frozenset(
+    {"volume_step_change", "skip_track", "action", "user_eq_bands"}
+)
+# Values that make an otherwise absolute parameter relative to the current state.
+UNCOLLAPSIBLE_VALUES = {
+    "mode_shuffle": ShuffleMode.TOGGLE,
+    "mode_repeat": RepeatMode.TOGGLE,
+}
+
+
+@dataclass
+class BufferedCommand:
+    """A request waiting for the connection to be restored."""
+
+    path: str
+    params: Optional[dict[str, str | int | float | bool]]
+    futures: list[asyncio.Future[Any]] = field(default_factory=list)
+    expiry: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def abandoned(self) -> bool:
+        """Return True if no caller is waiting for the result anymore."""
+        return all(future.done() for future in self.futures)
+
+
+class CommandBuffer:
+    """Hold requests while offline, keeping only the latest of superseded writes."""
+
+    def __init__(self, expiry: float) -> None:
+        self.expiry = expiry
+        self._commands: dict[Hashable, BufferedCommand] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def add(
+        self, path: str, params: Optional[dict[str, str | int | float | bool]] = None
+    ) -> asyncio.Future[Any]:
+        """Buffer a request and return a future for its response.
+
+        A request that sets the same parameters on the same path and zone as a
+        buffered one replaces it, moving to the end of the buffer. Callers of
+        the replaced request receive the response of the new one.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Any] = loop.create_future()
+        key = self._collapse_key(path, params)
+        command = BufferedCommand(path, params, [future])
+        if (previous := self._commands.pop(key, None)) is not None:
+            if previous.expiry is not None:
+                previous.expiry.cancel()
+            command.futures[:0] = previous.futures
+        command.expiry = loop.call_later(self.expiry, self._expire, key, command)
+        self._commands[key] = command
+        return future
+
+    def drain(self) -> list[BufferedCommand]:
+        """Remove and return the buffered requests that are still awaited, in order."""
+        commands, self._commands = list(self._commands.values()), {}
+        for command in commands:
+            if command.expiry is not None:
+                command.expiry.cancel()
+        return [command for command in commands if not command.abandoned]
+
+    def clear(self, reason: str) -> None:
+        """Fail all buffered requests."""
+        for command in self.drain():
+            self._fail(command, reason)
+
+    def _collapse_key(
+        self, path: str, params: Optional[dict[str, str | int | float | bool]]
+    ) -> Hashable:
+        params = params or {}
+        if UNCOLLAPSIBLE_PARAMS.intersection(params) or any(
+            params.get(key) == value for key, value in UNCOLLAPSIBLE_VALUES.items()
+        ):
+            return next(self._sequence)
+        return path, params.get("zone"), frozenset(params.keys() - {"zone"})
+
+    def _expire(self, key: Hashable, command: BufferedCommand) -> None:
+        if self._commands.get(key) is command:
+            del self._commands[key]
+        self._fail(command, "Connection was not restored before the command expired")
+
+    @staticmethod
+    def _fail(command: BufferedCommand, reason: str) -> None:
+        for future in command.futures:
+            if not future.done():
+                future.set_exception(StreamMagicConnectionError(reason))
@@ -0,0 +1,105 @@
+"""Endpoints supported by each StreamMagic model and API version."""
+
+import os
+from typing import Optional
+
+import orjson
+
+from aiostreammagic.models import Info
+from .const import _LOGGER, CAPABILITY_FAILURES
+
+
+class CapabilityRegistry:
+    """Registry of the endpoints each model and API version does not support.
+
+    Clients sharing a registry learn from each other: an optional topic that
+    one device answers with an error on `failures` bootstraps in a row is
+    recorded as unsupported for its model and API version, and clients of the
+    same model skip it on their next bootstrap. Failures are counted per
+    device and a successful fetch resets the count, so transient errors, even
+    on several devices at once, are never recorded. With a path the
+    unsupported topics are loaded from and saved to a JSON file, so they
+    survive restarts.
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, failures: int = CAPABILITY_FAILURES
+    ) -> None:
+        self.path = path
+        self.failures = failures
+        self._unsupported: dict[str, set[str]] = {}
+        # Consecutive failures by registry key, device UDN and endpoint.
+        self._failures: dict[tuple[str, str, str], int] = {}
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def key(info: Info) -> str:
+        """Return the registry key of a device."""
+        return f"{info.model}:{info.api_version}"
+
+    def unsupported(self, info: Info) -> frozenset[str]:
+        """Return the endpoints known to be unsupported by a device."""
+        return frozenset(self._unsupported.get(self.key(info), ()))
+
+    def supports(self, info: Info, path: str) -> bool:
+        """Return False if an endpoint is known to be unsupported by a device."""
+        return path not in self._unsupported.get(self.key(info), ())
+
+    def record_failure(self, info: Info, path: str) -> bool:
+        """Count a failed fetch of an endpoint, return True once it is unsupported."""
+        failure = (self.key(info), info.udn, path)
+        count = self._failures[failure] = self._failures.get(failure, 0) + 1
+        _LOGGER.debug("%s failed %s (%d of %d)", info.udn, path, count, self.failures)
+        if count < self.failures:
+            return False
+        del self._failures[failure]
+        self.mark_unsupported(info, path)
+        return True
+
+    def record_success(self, info: Info, path: str) -> None:
+        """Reset the failure count of an endpoint after a successful fetch."""
+        if self._failures:
+            self._failures.pop((self.key(info), info.udn, path), None)
+
+    def mark_unsupported(self, info: Info, path: str) -> None:
+        """Record that a device does not support an endpoint."""
+        paths = self._unsupported.setdefault(self.key(info), set())
+        if path in paths:
+            return
+        _LOGGER.debug("%s does not support %s", self.key(info), path)
+        paths.add(path)
+        self.save()
+
+    def forget(self, info: Optional[Info] = None) -> None:
+        """Forget what is known about a device, or about all devices."""
+        if info is None:
+            self._unsupported.clear()
+            self._failures.clear()
+        else:
+            key = self.key(info)
+            self._unsupported.pop(key, None)
+            self._failures = {
+                failure: count
+                for failure, count in self._failures.items()
+                if failure[0] != key
+            }
+        self.save()
+
+    def load(self) -> None:
+        """Load the registry from its file."""
+        assert self.path is not None
+        with open(self.path, "rb") as file:
+            data = orjson.loads(file.read())
+        self._unsupported = {key: set(paths) for key, paths in data.items()}
+
+    def save(self) -> None:
+        """Save the registry to its file, if it has one."""
+        if self.path is None:
+            return
+        data = {key: sorted(paths) for key, paths in self._unsupported.items()}
+        # Write to a temporary file first so readers never see a partial file.
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(temporary, self.path)
@@ -3,3 +3,33 @@ import logging
 _LOGGER = logging.getLogger(__package__)
 
 WS_HEARTBEAT_TIME = 30.0
+
+PROBE_INTERVAL = 10.0
+PROBE_TIMEOUT = 5.0
+PROBE_MAX_FAILURES = 2
+RTT_WINDOW = 10
+REQUEST_TIMEOUT = 10.0
+
+SSDP_ADDR = "239.255.255.250"
+SSDP_PORT = 1900
+SSDP_SEARCH_TARGET = "urn:schemas-upnp-org:device:MediaRenderer:1"
+DISCOVERY_TIMEOUT = 3.0
+DISCOVERY_TTL = 300.0
+
+DEFAULT_ZONE = "ZONE1"
+
+MAX_IN_FLIGHT = 8
+
+RAMP_MAX_RATE = 10.0
+
+HISTORY_SIZE = 1024
+
+CAPABILITY_FAILURES = 3
+
+DIAGNOSTICS_SLOWEST = 10
+DIAGNOSTICS_LAG_INTERVAL = 0.25
+
+EQ_SAMPLE_RATE = 48000.0
+EQ_RESPONSE_POINTS = 256
+EQ_RESPONSE_MIN_FREQ = 20.0
+EQ_RESPONSE_MAX_FREQ = 20000.0
@@ -0,0 +1,172 @@
+"""Runtime diagnostics of the message handling path of a StreamMagic client."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .const import _LOGGER, DIAGNOSTICS_LAG_INTERVAL, DIAGNOSTICS_SLOWEST
+
+# Stages of handling a message from the device, in order:
+# receive: waiting for and reading the next frame, this includes idle time
+# decode: parsing the JSON payload
+# resolve: matching the message to a pending request
+# queue: waiting in the queue of its subscription handler
+# handle: the subscription handler, mostly building models with from_dict
+# callbacks: running the state update callbacks
+STAGES = ("receive", "decode", "resolve", "queue", "handle", "callbacks")
+
+# Trace of the message being handled by the current subscription handler task.
+current_trace: ContextVar[Optional["MessageTrace"]] = ContextVar(
+    "current_trace", default=None
+)
+
+
+@dataclass
+class MessageTrace:
+    """Time spent in each stage while handling one message."""
+
+    path: str
+    start: float
+    last: float = 0.0
+    stages: dict[str, float] = field(default_factory=dict)
+
+    def lap(self) -> float:
+        """Return the time since the previous lap or the start of the trace."""
+        now = time.perf_counter()
+        duration = now - (self.last or self.start)
+        self.last = now
+        return duration
+
+    def add(self, stage: str, duration: float) -> None:
+        """Add time spent in a stage."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + duration
+
+
+@dataclass
+class StageStats:
+    """Running totals of the time spent in one stage."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, duration: float) -> None:
+        """Add one measurement."""
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def as_dict(self) -> dict[str, float]:
+        """Return the totals with the mean, in seconds."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+
+class Diagnostics:
+    """Collect event loop lag, per stage timings and the slowest messages.
+
+    Enabled on a client with enable_diagnostics(). Timings are only taken
+    while enabled, so a client without diagnostics pays one attribute check
+    per message. The receive stage is not part of the time of a message, as
+    it mostly measures waiting for the device.
+    """
+
+    def __init__(
+        self,
+        slowest: int = DIAGNOSTICS_SLOWEST,
+        lag_interval: float = DIAGNOSTICS_LAG_INTERVAL,
+        log_interval: Optional[float] = None,
+    ) -> None:
+        self.slowest = slowest
+        self.lag_interval = lag_interval
+        self.log_interval = log_interval
+        self._tasks: list[asyncio.Task[None]] = []
+        self._sequence = itertools.count()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all collected measurements."""
+        self.started = time.monotonic()
+        self.messages = 0
+        self.stages = {stage: StageStats() for stage in STAGES}
+        self.loop_lag = StageStats()
+        self._slowest: list[tuple[float, int, MessageTrace]] = []
+
+    def start(self) -> None:
+        """Start sampling event loop lag and logging summaries."""
+        self._tasks.append(asyncio.create_task(self._sample_lag()))
+        if self.log_interval:
+            self._tasks.append(asyncio.create_task(self._log_summaries()))
+
+    async def stop(self) -> None:
+        """Stop the background sampling."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _sample_lag(self) -> None:
+        """Measure how late the event loop wakes up a sleeping task."""
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag.add(max(0.0, loop.time() - scheduled))
+
+    async def _log_summaries(self) -> None:
+        assert self.log_interval is not None
+        while True:
+            await asyncio.sleep(self.log_interval)
+            _LOGGER.info("StreamMagic diagnostics: %s", self.format_summary())
+
+    def finish(self, trace: MessageTrace) -> None:
+        """Record the stages of a fully handled message."""
+        self.messages += 1
+        for stage, duration in trace.stages.items():
+            self.stages[stage].add(duration)
+        if not self.slowest:
+            return
+        total = time.perf_counter() - trace.start
+        item = (total, next(self._sequence), trace)
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, item)
+        elif total > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def summary(self) -> dict[str, Any]:
+        """Return the measurements as a dict of plain values, times in seconds."""
+        return {
+            "duration": time.monotonic() - self.started,
+            "messages": self.messages,
+            "loop_lag": self.loop_lag.as_dict(),
+            "stages": {stage: stats.as_dict() for stage, stats in self.stages.items()},
+            "slowest": [
+                {"path": trace.path, "total": total, "stages": dict(trace.stages)}
+                for total, _, trace in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+    def format_summary(self) -> str:
+        """Return a one line summary for logging, times in milliseconds."""
+        stages = " ".join(
+            f"{stage}={stats.total * 1000:.1f}/{stats.max * 1000:.1f}"
+            for stage, stats in self.stages.items()
+            if stage != "receive"
+        )
+        slowest = "none"
+        if self._slowest:
+            total, _, trace = max(self._slowest)
+            slowest = f"{trace.path} {total * 1000:.1f}ms"
+        return (
+            f"messages={self.messages} "
+            f"loop_lag_max={self.loop_lag.max * 1000:.1f}ms "
+            f"total/max_ms: {stages} slowest={slowest}"
+        )
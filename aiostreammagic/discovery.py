@@ -0,0 +1,173 @@
+"""Network discovery of StreamMagic devices."""
+
+import asyncio
+import socket
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+import orjson
+from aiohttp import ClientError, ClientSession, ClientTimeout
+
+from aiostreammagic.models import Info
+from . import endpoints as ep
+from .const import (
+    _LOGGER,
+    SSDP_ADDR,
+    SSDP_PORT,
+    SSDP_SEARCH_TARGET,
+    DISCOVERY_TIMEOUT,
+    DISCOVERY_TTL,
+)
+
+
+@dataclass
+class DiscoveredDevice:
+    """Data class representing a StreamMagic device found on the network."""
+
+    host: str
+    udn: str
+    unit_id: str
+    model: str
+    name: str
+    api_version: str
+    last_seen: float
+
+    @classmethod
+    def from_info(cls, host: str, info: Info) -> "DiscoveredDevice":
+        """Create a discovered device from the info reported by the device."""
+        return cls(
+            host=host,
+            udn=info.udn,
+            unit_id=info.unit_id,
+            model=info.model,
+            name=info.name,
+            api_version=info.api_version,
+            last_seen=time.monotonic(),
+        )
+
+
+class _SSDPProtocol(asyncio.DatagramProtocol):
+    """Collect the hosts answering an SSDP M-SEARCH."""
+
+    def __init__(self) -> None:
+        self.hosts: set[str] = set()
+
+    def datagram_received(self, data: bytes, addr: tuple[str | int, int]) -> None:
+        host = str(addr[0])
+        for line in data.decode(errors="ignore").splitlines():
+            key, _, value = line.partition(":")
+            if key.strip().lower() == "location":
+                host = urlparse(value.strip()).hostname or host
+                break
+        self.hosts.add(host)
+
+
+async def _ssdp_search(timeout: float) -> set[str]:
+    """Send an SSDP M-SEARCH and return the hosts that responded."""
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+    sock.bind(("", 0))
+    transport, protocol = await loop.create_datagram_endpoint(_SSDPProtocol, sock=sock)
+    try:
+        message = (
+            "M-SEARCH * HTTP/1.1\r\n"
+            f"HOST: {SSDP_ADDR}:{SSDP_PORT}\r\n"
+            'MAN: "ssdp:discover"\r\n'
+            f"MX: {max(1, int(timeout))}\r\n"
+            f"ST: {SSDP_SEARCH_TARGET}\r\n"
+            "\r\n"
+        )
+        transport.sendto(message.encode(), (SSDP_ADDR, SSDP_PORT))
+        await asyncio.sleep(timeout)
+    finally:
+        transport.close()
+    return protocol.hosts
+
+
+async def _fetch_info(
+    session: ClientSession, host: str, timeout: float
+) -> Optional[DiscoveredDevice]:
+    """Query a host for StreamMagic device info, returning None if it is not one."""
+    try:
+        async with session.get(
+            f"http://{host}/smoip{ep.INFO}", timeout=ClientTimeout(total=timeout)
+        ) as resp:
+            data = orjson.loads(await resp.read())
+        return DiscoveredDevice.from_info(host, Info.from_dict(data["params"]["data"]))
+    except (ClientError, TimeoutError, ValueError, KeyError, TypeError):
+        _LOGGER.debug("Host %s is not a StreamMagic device", host)
+        return None
+
+
+async def async_discover(
+    timeout: float = DISCOVERY_TIMEOUT, session: ClientSession | None = None
+) -> list[DiscoveredDevice]:
+    """Discover StreamMagic devices on the local network."""
+    hosts = await _ssdp_search(timeout)
+    if not hosts:
+        return []
+    own_session = session is None
+    session = session or ClientSession()
+    try:
+        results = await asyncio.gather(
+            *(_fetch_info(session, host, timeout) for host in hosts)
+        )
+    finally:
+        if own_session:
+            await session.close()
+    return [device for device in results if device is not None]
+
+
+class DeviceRegistry:
+    """Registry of discovered StreamMagic devices keyed by UDN."""
+
+    def __init__(
+        self,
+        ttl: float = DISCOVERY_TTL,
+        timeout: float = DISCOVERY_TIMEOUT,
+        session: ClientSession | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = session
+        self._devices: dict[str, DiscoveredDevice] = {}
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def devices(self) -> list[DiscoveredDevice]:
+        """Return all devices that have not expired."""
+        return [
+            device for device in self._devices.values() if not self._is_expired(device)
+        ]
+
+    def _is_expired(self, device: DiscoveredDevice) -> bool:
+        return time.monotonic() - device.last_seen > self.ttl
+
+    def get(self, udn: str) -> Optional[DiscoveredDevice]:
+        """Return a cached device by UDN if it has not expired."""
+        device = self._devices.get(udn)
+        if device is None or self._is_expired(device):
+            return None
+        return device
+
+    async def async_refresh(self) -> list[DiscoveredDevice]:
+        """Run discovery and update the registry."""
+        async with self._refresh_lock:
+            for device in await async_discover(self.timeout, self.session):
+                self._devices[device.udn] = device
+            for udn in [udn for udn, d in self._devices.items() if self._is_expired(d)]:
+                del self._devices[udn]
+        return self.devices
+
+    async def async_resolve(
+        self, udn: str, *, force_refresh: bool = False
+    ) -> Optional[str]:
+        """Return the current host of a device, running discovery if required."""
+        device = None if force_refresh else self.get(udn)
+        if device is None:
+            await self.async_refresh()
+            device = self.get(udn)
+        return device.host if device else None
@@ -15,3 +15,9 @@ ZONE_AUDIO_OUTPUT = "/zone/audio/output"
 DISPLAY = "/system/display"
 PRESET_LIST = "/presets/list"
 RECALL_PRESET = "/zone/recall_preset"
+
+# Topics kept subscribed while the device is in standby, see standby_topics
+STANDBY_TOPICS = (INFO, ZONE_STATE)
+
+# Topics some models do not have, see CapabilityRegistry
+OPTIONAL_TOPICS = (NOW_PLAYING, AUDIO, ZONE_AUDIO_OUTPUT, DISPLAY, UPDATE, PRESET_LIST)
@@ -0,0 +1,229 @@
+"""Frequency response of the user equalizer.
+
+Requires numpy, available through the ``eq`` extra.
+"""
+
+from functools import lru_cache
+
+try:
+    import numpy as np
+    import numpy.typing as npt
+except ImportError as err:  # pragma: no cover
+    raise ImportError(
+        "EQ response curves require numpy, install aiostreammagic[eq]"
+    ) from err
+
+from aiostreammagic.models import DEFAULT_EQ_BANDS, EQ_PRESETS, EQBand, EQFilterType
+from .const import (
+    EQ_RESPONSE_MAX_FREQ,
+    EQ_RESPONSE_MIN_FREQ,
+    EQ_RESPONSE_POINTS,
+    EQ_SAMPLE_RATE,
+)
+
+# (filter, freq, gain, q) with defaults filled in from DEFAULT_EQ_BANDS
+BandKey = tuple[str, float, float, float]
+
+_DEFAULT_BANDS = {band.index: band for band in DEFAULT_EQ_BANDS}
+
+
+def _band_key(band: EQBand) -> BandKey:
+    default = _DEFAULT_BANDS.get(band.index)
+
+    def pick(name: str, fallback: object) -> object:
+        value = getattr(band, name)
+        if value is None and default is not None:
+            value = getattr(default, name)
+        return fallback if value is None else value
+
+    return (
+        str(pick("filter", EQFilterType.PASSTHROUGH)),
+        float(pick("freq", 1000.0)),  # type: ignore[arg-type]
+        float(pick("gain", 0.0)),  # type: ignore[arg-type]
+        float(pick("q", 0.707)),  # type: ignore[arg-type]
+    )
+
+
+def _coefficients(
+    keys: tuple[BandKey, ...], sample_rate: float
+) -> npt.NDArray[np.float64]:
+    """RBJ biquad coefficients (b0, b1, b2, a0, a1, a2) for each band."""
+    filters = np.array([key[0] for key in keys])
+    freq, gain, q = np.array([key[1:] for key in keys], dtype=np.float64).T
+    a = 10.0 ** (gain / 40.0)
+    w0 = 2.0 * np.pi * freq / sample_rate
+    cos, alpha = np.cos(w0), np.sin(w0) / (2.0 * q)
+    sqrt_a = 2.0 * np.sqrt(a) * alpha
+    one, zero = np.ones_like(w0), np.zeros_like(w0)
+
+    formulas = {
+        EQFilterType.PEAKING: (
+            1 + alpha * a,
+            -2 * cos,
+            1 - alpha * a,
+            1 + alpha / a,
+            -2 * cos,
+            1 - alpha / a,
+        ),
+        EQFilterType.LOWSHELF: (
+            a * ((a + 1) - (a - 1) * cos + sqrt_a),
+            2 * a * ((a - 1) - (a + 1) * cos),
+            a * ((a + 1) - (a - 1) * cos - sqrt_a),
+            (a + 1) + (a - 1) * cos + sqrt_a,
+            -2 * ((a - 1) + (a + 1) * cos),
+            (a + 1) + (a - 1) * cos - sqrt_a,
+        ),
+        EQFilterType.HIGHSHELF: (
+            a * ((a + 1) + (a - 1) * cos + sqrt_a),
+            -2 * a * ((a - 1) + (a + 1) * cos),
+            a * ((a + 1) + (a - 1) * cos - sqrt_a),
+            (a + 1) - (a - 1) * cos + sqrt_a,
+            2 * ((a - 1) - (a + 1) * cos),
+            (a + 1) - (a - 1) * cos - sqrt_a,
+        ),
+        EQFilterType.NOTCH: (one, -2 * cos, one, 1 + alpha, -2 * cos, 1 - alpha),
+        EQFilterType.HIGHPASS: (
+            (1 + cos) / 2,
+            -(1 + cos),
+            (1 + cos) / 2,
+            1 + alpha,
+            -2 * cos,
+            1 - alpha,
+        ),
+        EQFilterType.LOWPASS: (
+            (1 - cos) / 2,
+            1 - cos,
+            (1 - cos) / 2,
+            1 + alpha,
+            -2 * cos,
+            1 - alpha,
+        ),
+        EQFilterType.ALLPASS: (
+            1 - alpha,
+            -2 * cos,
+            1 + alpha,
+            1 + alpha,
+            -2 * cos,
+            1 - alpha,
+        ),
+    }
+    passthrough = np.stack((one, zero, zero, one, zero, zero), axis=-1)
+    conditions = [filters == str(filter_type) for filter_type in formulas]
+    choices = [np.stack(coeffs, axis=-1) for coeffs in formulas.values()]
+    return np.select(
+        [cond[:, None] for cond in conditions], choices, default=passthrough
+    )
+
+
+@lru_cache(maxsize=8)
+def _grid(
+    points: int, f_min: float, f_max: float, sample_rate: float
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.complex128]]:
+    freqs = np.geomspace(f_min, f_max, points)
+    z = np.exp(-1j * 2.0 * np.pi * freqs / sample_rate)
+    powers = np.stack((np.ones_like(z), z, z * z))
+    freqs.flags.writeable = False
+    powers.flags.writeable = False
+    return freqs, powers
+
+
+def _response_db(
+    coefficients: npt.NDArray[np.float64], powers: npt.NDArray[np.complex128]
+) -> npt.NDArray[np.float64]:
+    """Combined response in dB, summing over the band axis (second to last)."""
+    num = coefficients[..., :3] @ powers
+    den = coefficients[..., 3:] @ powers
+    db = 20.0 * np.log10(np.abs(num) / np.abs(den))
+    result: npt.NDArray[np.float64] = db.sum(axis=-2)
+    return result
+
+
+@lru_cache(maxsize=256)
+def _cached_response(
+    keys: tuple[BandKey, ...],
+    points: int,
+    f_min: float,
+    f_max: float,
+    sample_rate: float,
+) -> npt.NDArray[np.float64]:
+    _, powers = _grid(points, f_min, f_max, sample_rate)
+    response = _response_db(_coefficients(keys, sample_rate), powers)
+    response.flags.writeable = False
+    return response
+
+
+def eq_frequencies(
+    points: int = EQ_RESPONSE_POINTS,
+    f_min: float = EQ_RESPONSE_MIN_FREQ,
+    f_max: float = EQ_RESPONSE_MAX_FREQ,
+) -> npt.NDArray[np.float64]:
+    """Return the log-spaced frequency grid (Hz) the responses are computed on."""
+    return _grid(points, f_min, f_max, EQ_SAMPLE_RATE)[0]
+
+
+def eq_response(
+    bands: list[EQBand],
+    *,
+    points: int = EQ_RESPONSE_POINTS,
+    f_min: float = EQ_RESPONSE_MIN_FREQ,
+    f_max: float = EQ_RESPONSE_MAX_FREQ,
+    sample_rate: float = EQ_SAMPLE_RATE,
+) -> npt.NDArray[np.float64]:
+    """Compute the combined magnitude response of the EQ bands.
+
+    Fields left as None are taken from DEFAULT_EQ_BANDS. Results are cached
+    per band settings and returned as read-only arrays.
+
+    Args:
+        bands: Bands to evaluate, such as Audio.user_eq.bands
+        points: Number of points on the frequency grid
+        f_min: Lowest frequency of the grid in Hz
+        f_max: Highest frequency of the grid in Hz
+        sample_rate: Sample rate the biquads are designed for
+
+    Returns:
+        Gain in dB at each frequency of eq_frequencies()
+    """
+    keys = tuple(_band_key(band) for band in bands)
+    if not keys:
+        return np.zeros(points)
+    return _cached_response(keys, points, f_min, f_max, sample_rate)
+
+
+def eq_preset_responses(
+    *,
+    points: int = EQ_RESPONSE_POINTS,
+    f_min: float = EQ_RESPONSE_MIN_FREQ,
+    f_max: float = EQ_RESPONSE_MAX_FREQ,
+    sample_rate: float = EQ_SAMPLE_RATE,
+) -> dict[str, npt.NDArray[np.float64]]:
+    """Compute the response of every entry in EQ_PRESETS in a single pass.
+
+    Returns:
+        Mapping of preset name to gain in dB at each frequency of eq_frequencies()
+    """
+    return dict(_preset_responses(points, f_min, f_max, sample_rate))
+
+
+@lru_cache(maxsize=8)
+def _preset_responses(
+    points: int, f_min: float, f_max: float, sample_rate: float
+) -> dict[str, npt.NDArray[np.float64]]:
+    # Every preset sets the gain of all 7 bands, so the coefficients of all
+    # presets are computed together and reshaped to (preset, band, coefficient)
+    keys = tuple(
+        _band_key(EQBand(index=i, gain=gain))
+        for gains in EQ_PRESETS.values()
+        for i, gain in enumerate(gains)
+    )
+    coefficients = _coefficients(keys, sample_rate).reshape(len(EQ_PRESETS), -1, 6)
+    _, powers = _grid(points, f_min, f_max, sample_rate)
+    responses = _response_db(coefficients, powers)
+    responses.flags.writeable = False
+    return dict(zip(EQ_PRESETS, responses))
+
+
+def clear_eq_cache() -> None:
+    """Drop cached responses, for example after changing EQ_PRESETS."""
+    _cached_response.cache_clear()
+    _preset_responses.cache_clear()
@@ -7,3 +7,11 @@ class StreamMagicError(Exception):
 
 class StreamMagicConnectionError(StreamMagicError):
     """StreamMagic connection exception."""
+
+
+class StreamMagicResponseError(StreamMagicError):
+    """StreamMagic device answered a request with an error."""
+
+    def __init__(self, message: str, result: int) -> None:
+        super().__init__(message)
+        self.result = result
@@ -0,0 +1,367 @@
+"""Run StreamMagic clients for many devices across worker processes."""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import count
+from multiprocessing.connection import Connection
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import orjson
+
+from aiostreammagic.exceptions import StreamMagicConnectionError, StreamMagicError
+from aiostreammagic.models import CallbackType
+from .const import _LOGGER
+
+# Frames are orjson encoded dicts sent over a duplex pipe per worker:
+#   parent -> worker: {"id", "host", "method", "args", "kwargs"} or {"stop": True}
+#   worker -> parent: {"id", "result"} / {"id", "error", "connection"},
+#                     {"host", "state"} and {"ready": [failed hosts]}
+
+
+class _FrameWriter:
+    """Write frames to a pipe in order from a thread.
+
+    Pipe writes block once the pipe is full, which would stall the event loop
+    and could deadlock when both ends write at the same time, so they never run
+    on the loop.
+    """
+
+    def __init__(self, conn: Connection) -> None:
+        self._conn = conn
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="fleet-writer")
+
+    def send(self, frame: dict[str, Any]) -> asyncio.Future[None]:
+        """Queue a frame and return a future that is done once it is written."""
+        return asyncio.get_running_loop().run_in_executor(
+            self._executor, self._conn.send_bytes, orjson.dumps(frame)
+        )
+
+    def close(self) -> asyncio.Future[None]:
+        """Close the pipe once the queued frames are written."""
+        closed = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._conn.close
+        )
+        self._executor.shutdown(wait=False)
+        return closed
+
+
+def device_summary(client: Any) -> dict[str, Any]:
+    """Return the compact state of a client that is streamed to the parent."""
+    state = client._state
+    play_state = client._play_state
+    return {
+        "connected": client.is_connected(),
+        "power": state.power if state else None,
+        "source": state.source if state else None,
+        "volume_percent": state.volume_percent if state else None,
+        "mute": state.mute if state else None,
+        "play_state": play_state.state if play_state else None,
+        "title": play_state.metadata.title if play_state else None,
+    }
+
+
+def _run_worker(conn: Connection, hosts: list[str], options: dict[str, Any]) -> None:
+    """Entry point of a worker process."""
+    asyncio.run(_async_worker(conn, hosts, options))
+
+
+async def _async_worker(
+    conn: Connection, hosts: list[str], options: dict[str, Any]
+) -> None:
+    """Connect the clients of a shard and serve requests from the parent."""
+    from aiohttp import ClientSession
+
+    from aiostreammagic.stream_magic import StreamMagicClient
+
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+    session = ClientSession()
+    clients = {
+        host: StreamMagicClient(host, session, should_close_session=False, **options)
+        for host in hosts
+    }
+    summaries: dict[str, dict[str, Any]] = {}
+    tasks: set[asyncio.Task[Any]] = set()
+    writer = _FrameWriter(conn)
+
+    def on_sent(future: asyncio.Future[None]) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            # The parent is gone, the reader sees the closed pipe and stops.
+            _LOGGER.debug("Failed to send a frame: %s", future.exception())
+
+    def send(frame: dict[str, Any]) -> None:
+        writer.send(frame).add_done_callback(on_sent)
+
+    async def on_update(
+        host: str, client: StreamMagicClient, callback_type: CallbackType
+    ) -> None:
+        summary = device_summary(client)
+        if summaries.get(host) != summary:
+            summaries[host] = summary
+            send({"host": host, "state": summary})
+
+    async def call(frame: dict[str, Any]) -> None:
+        try:
+            method = frame["method"]
+            if method.startswith("_"):
+                raise StreamMagicError(f"Unknown method {method}")
+            result = await getattr(clients[frame["host"]], method)(
+                *frame["args"], **frame["kwargs"]
+            )
+            send({"id": frame["id"], "result": result})
+        except Exception as ex:  # noqa: BLE001 - errors are returned to the caller
+            send(
+                {
+                    "id": frame["id"],
+                    "error": str(ex) or type(ex).__name__,
+                    "connection": isinstance(ex, StreamMagicConnectionError),
+                }
+            )
+
+    def on_readable() -> None:
+        try:
+            while conn.poll():
+                frame = orjson.loads(conn.recv_bytes())
+                if frame.get("stop"):
+                    if not stopped.done():
+                        stopped.set_result(None)
+                    return
+                task = loop.create_task(call(frame))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except EOFError:
+            if not stopped.done():
+                stopped.set_result(None)
+
+    loop.add_reader(conn.fileno(), on_readable)
+    try:
+        for host, client in clients.items():
+            await client.register_state_update_callbacks(partial(on_update, host))
+        results = await asyncio.gather(
+            *(client.connect() for client in clients.values()),
+            return_exceptions=True,
+        )
+        failed = [
+            host
+            for host, result in zip(clients, results)
+            if isinstance(result, BaseException)
+        ]
+        send({"ready": failed})
+        await stopped
+    finally:
+        loop.remove_reader(conn.fileno())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(
+            *(client.disconnect() for client in clients.values()),
+            return_exceptions=True,
+        )
+        await session.close()
+        await writer.close()
+
+
+class _Shard:
+    """Parent side of a worker process."""
+
+    def __init__(self, hosts: list[str]) -> None:
+        self.hosts = hosts
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.conn: Optional[Connection] = None
+        self.writer: Optional[_FrameWriter] = None
+        self.ready: Optional[asyncio.Future[list[str]]] = None
+        self.futures: dict[int, asyncio.Future[Any]] = {}
+        self.stopping = False
+
+
+class StreamMagicFleet:
+    """Shard clients for many devices across worker processes.
+
+    Each worker runs its own event loop and aiohttp session. Calls are routed
+    to the worker owning the host, and compact state summaries are streamed
+    back whenever they change. Requires a platform where the event loop can
+    watch pipes (not the Windows proactor loop).
+    """
+
+    def __init__(
+        self,
+        hosts: Iterable[str],
+        workers: Optional[int] = None,
+        **client_options: Any,
+    ) -> None:
+        self.hosts = list(dict.fromkeys(hosts))
+        workers = min(workers or os.cpu_count() or 1, len(self.hosts)) or 1
+        self._shards = [_Shard([]) for _ in range(workers)]
+        self._owners = {host: index % workers for index, host in enumerate(self.hosts)}
+        for host, index in self._owners.items():
+            self._shards[index].hosts.append(host)
+        self._client_options = client_options
+        self.states: dict[str, dict[str, Any]] = {}
+        self.failed_hosts: list[str] = []
+        self.state_update_callbacks: list[
+            Callable[[str, dict[str, Any]], Awaitable[None]]
+        ] = []
+        self._ids = count()
+        self._tasks: set[asyncio.Future[None]] = set()
+
+    def shard_index(self, host: str) -> int:
+        """Return the index of the worker owning a host."""
+        return self._owners[host]
+
+    async def register_state_update_callbacks(
+        self, callback: Callable[[str, dict[str, Any]], Awaitable[None]]
+    ) -> None:
+        """Register a callback called with the host and summary on state changes."""
+        self.state_update_callbacks.append(callback)
+
+    def unregister_state_update_callbacks(
+        self, callback: Callable[[str, dict[str, Any]], Awaitable[None]]
+    ) -> None:
+        """Unregister a state update callback."""
+        if callback in self.state_update_callbacks:
+            self.state_update_callbacks.remove(callback)
+
+    async def start(self) -> None:
+        """Start the workers and wait until every client attempted to connect."""
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        for shard in self._shards:
+            if not shard.hosts:
+                continue
+            parent_conn, child_conn = context.Pipe()
+            shard.conn = parent_conn
+            shard.writer = _FrameWriter(parent_conn)
+            shard.ready = loop.create_future()
+            shard.process = context.Process(
+                target=_run_worker,
+                args=(child_conn, shard.hosts, self._client_options),
+                daemon=True,
+            )
+            shard.process.start()
+            child_conn.close()
+            loop.add_reader(parent_conn.fileno(), self._on_readable, shard)
+        for shard in self._shards:
+            if shard.ready is not None:
+                self.failed_hosts.extend(await shard.ready)
+        if self.failed_hosts:
+            _LOGGER.warning("Failed to connect to %s", ", ".join(self.failed_hosts))
+
+    async def stop(self) -> None:
+        """Disconnect all clients and stop the workers."""
+        loop = asyncio.get_running_loop()
+        running = [
+            shard
+            for shard in self._shards
+            if shard.conn is not None and shard.process is not None
+        ]
+        for shard in running:
+            assert shard.writer is not None
+            shard.stopping = True
+            try:
+                await shard.writer.send({"stop": True})
+            except OSError:
+                pass
+        for shard in running:
+            assert shard.process is not None
+            await loop.run_in_executor(None, shard.process.join, 10)
+            if shard.process.is_alive():
+                shard.process.terminate()
+            self._close_shard(shard)
+
+    async def call(self, host: str, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Call a client method for a host in its worker and return the result.
+
+        Results are sent back as JSON, so models arrive as plain dicts.
+        """
+        if host not in self._owners:
+            raise StreamMagicError(f"Unknown host {host}")
+        shard = self._shards[self.shard_index(host)]
+        if shard.writer is None:
+            raise StreamMagicConnectionError("Fleet worker is not running.")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        shard.futures[request_id] = future
+        frame = {
+            "id": request_id,
+            "host": host,
+            "method": method,
+            "args": args,
+            "kwargs": kwargs,
+        }
+        try:
+            try:
+                await shard.writer.send(frame)
+            except OSError as ex:
+                raise StreamMagicConnectionError("Fleet worker stopped.") from ex
+            return await future
+        finally:
+            shard.futures.pop(request_id, None)
+
+    def _on_readable(self, shard: _Shard) -> None:
+        """Handle frames sent by a worker."""
+        assert shard.conn is not None
+        try:
+            while shard.conn.poll():
+                self._handle_frame(shard, orjson.loads(shard.conn.recv_bytes()))
+        except (EOFError, OSError):
+            if not shard.stopping:
+                _LOGGER.warning("Fleet worker for %s stopped", ", ".join(shard.hosts))
+            self._close_shard(shard)
+
+    def _handle_frame(self, shard: _Shard, frame: dict[str, Any]) -> None:
+        if "id" in frame:
+            future = shard.futures.get(frame["id"])
+            if future is None or future.done():
+                return
+            if "error" in frame:
+                error = (
+                    StreamMagicConnectionError
+                    if frame["connection"]
+                    else StreamMagicError
+                )
+                future.set_exception(error(frame["error"]))
+            else:
+                future.set_result(frame.get("result"))
+        elif "state" in frame:
+            host, state = frame["host"], frame["state"]
+            self.states[host] = state
+            for callback in self.state_update_callbacks:
+                task = asyncio.ensure_future(callback(host, state))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        elif "ready" in frame and shard.ready is not None:
+            if not shard.ready.done():
+                shard.ready.set_result(frame["ready"])
+
+    def _close_shard(self, shard: _Shard) -> None:
+        if shard.conn is None:
+            return
+        asyncio.get_running_loop().remove_reader(shard.conn.fileno())
+        if shard.writer is not None:
+            shard.writer.close()
+            shard.writer = None
+        shard.conn = None
+        if shard.ready is not None and not shard.ready.done():
+            shard.ready.set_result(list(shard.hosts))
+        for host in shard.hosts:
+            if host in self.states:
+                self.states[host] = {**self.states[host], "connected": False}
+        for future in shard.futures.values():
+            if not future.done():
+                future.set_exception(
+                    StreamMagicConnectionError("Fleet worker stopped.")
+                )
+
+    async def __aenter__(self) -> "StreamMagicFleet":
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: object | None,
+    ) -> None:
+        await self.stop()
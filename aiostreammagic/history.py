@@ -0,0 +1,247 @@
+"""Bounded history of state changes of a StreamMagic zone."""
+
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any, Optional, overload
+
+from aiostreammagic.models import HistoryKind, PlayState, State
+from aiostreammagic.util import RawData
+from .const import HISTORY_SIZE
+
+_KINDS = list(HistoryKind)
+_STRING_KINDS = frozenset(
+    {HistoryKind.SOURCE, HistoryKind.PLAY_STATE, HistoryKind.TRACK}
+)
+_NONE = -1
+_MISSING = object()
+
+# Where each kind is read from: the index of the model in (state, play_state),
+# the field names leading to the value, which are also the keys of the raw
+# data, and the default of the field.
+_FIELDS: dict[HistoryKind, tuple[int, tuple[str, ...], Any]] = {
+    HistoryKind.POWER: (0, ("power",), _MISSING),
+    HistoryKind.VOLUME: (0, ("volume_percent",), None),
+    HistoryKind.MUTE: (0, ("mute",), False),
+    HistoryKind.SOURCE: (0, ("source",), _MISSING),
+    HistoryKind.PLAY_STATE: (1, ("state",), "not_ready"),
+    HistoryKind.TRACK: (1, ("metadata", "title"), None),
+}
+
+
+def _value(model: Any, names: tuple[str, ...], default: Any) -> Any:
+    """Return a field of a model, reading raw data without decoding it."""
+    if model is None:
+        return _MISSING
+    if isinstance(model, RawData):
+        data = model.data
+        for name in names[:-1]:
+            data = data.get(name) or {}
+        return data.get(names[-1], default)
+    for name in names:
+        model = getattr(model, name)
+    return model
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryEntry:
+    """A recorded change of a value."""
+
+    timestamp: float
+    kind: HistoryKind
+    old: Any
+    new: Any
+
+
+class _Timestamps(Sequence[float]):
+    """Timestamps of a history in chronological order, for bisecting."""
+
+    def __init__(self, history: "StateHistory") -> None:
+        self._history = history
+
+    def __len__(self) -> int:
+        return len(self._history)
+
+    @overload
+    def __getitem__(self, index: int) -> float: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[float]: ...
+
+    def __getitem__(self, index: int | slice) -> float | Sequence[float]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._history._times[self._history._slot(index)]
+
+
+class StateHistory:
+    """Fixed-capacity ring buffer of state changes.
+
+    Entries are stored in preallocated arrays, and strings such as sources
+    and track titles are interned and dropped once no entry refers to them,
+    so memory use is bounded by the capacity however long the client runs.
+    """
+
+    def __init__(self, capacity: int = HISTORY_SIZE) -> None:
+        if capacity <= 0:
+            raise ValueError("History capacity must be greater than 0")
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._kinds = array("B", bytes(capacity))
+        self._old = array("q", bytes(8 * capacity))
+        self._new = array("q", bytes(8 * capacity))
+        self._start = 0
+        self._length = 0
+        self._strings: list[Optional[str]] = []
+        self._string_ids: dict[str, int] = {}
+        self._string_refs: list[int] = []
+        self._free_ids: list[int] = []
+        self._last: Optional[tuple[Any, Any]] = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        return (self._entry(i) for i in range(self._length))
+
+    def _slot(self, index: int) -> int:
+        return (self._start + index) % self.capacity
+
+    def _intern(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            if self._free_ids:
+                string_id = self._free_ids.pop()
+                self._strings[string_id] = value
+                self._string_refs[string_id] = 0
+            else:
+                string_id = len(self._strings)
+                self._strings.append(value)
+                self._string_refs.append(0)
+            self._string_ids[value] = string_id
+        self._string_refs[string_id] += 1
+        return string_id
+
+    def _release(self, string_id: int) -> None:
+        if string_id == _NONE:
+            return
+        self._string_refs[string_id] -= 1
+        if not self._string_refs[string_id]:
+            value = self._strings[string_id]
+            assert value is not None
+            del self._string_ids[value]
+            self._strings[string_id] = None
+            self._free_ids.append(string_id)
+
+    def _encode(self, kind: HistoryKind, value: Any) -> int:
+        if value is None:
+            return _NONE
+        if kind in _STRING_KINDS:
+            return self._intern(str(value))
+        return int(value)
+
+    def _decode(self, kind: HistoryKind, raw: int) -> Any:
+        if raw == _NONE:
+            return None
+        if kind in _STRING_KINDS:
+            return self._strings[raw]
+        if kind in (HistoryKind.POWER, HistoryKind.MUTE):
+            return bool(raw)
+        return raw
+
+    def _entry(self, index: int) -> HistoryEntry:
+        slot = self._slot(index)
+        kind = _KINDS[self._kinds[slot]]
+        return HistoryEntry(
+            self._times[slot],
+            kind,
+            self._decode(kind, self._old[slot]),
+            self._decode(kind, self._new[slot]),
+        )
+
+    def append(
+        self, kind: HistoryKind, old: Any, new: Any, timestamp: Optional[float] = None
+    ) -> None:
+        """Add a change, replacing the oldest entry when the history is full."""
+        timestamp = time.time() if timestamp is None else timestamp
+        if self._length:
+            # Keep timestamps ordered for range queries if the clock steps back.
+            timestamp = max(timestamp, self._times[self._slot(self._length - 1)])
+        if self._length == self.capacity:
+            slot = self._start
+            if _KINDS[self._kinds[slot]] in _STRING_KINDS:
+                self._release(self._old[slot])
+                self._release(self._new[slot])
+            self._start = (self._start + 1) % self.capacity
+        else:
+            slot = self._slot(self._length)
+            self._length += 1
+        self._times[slot] = timestamp
+        self._kinds[slot] = _KINDS.index(kind)
+        self._old[slot] = self._encode(kind, old)
+        self._new[slot] = self._encode(kind, new)
+
+    def observe(
+        self,
+        state: State | RawData | None,
+        play_state: PlayState | RawData | None,
+    ) -> None:
+        """Add the changes between the last observed models and these.
+
+        Models may be given as raw data, which is read without decoding it.
+        """
+        models = (state, play_state)
+        last, self._last = self._last, models
+        if last is None or all(
+            model is previous for model, previous in zip(models, last)
+        ):
+            return
+        for kind, (index, names, default) in _FIELDS.items():
+            old = _value(last[index], names, default)
+            new = _value(models[index], names, default)
+            if old is not _MISSING and new is not _MISSING and old != new:
+                self.append(kind, old, new)
+
+    def last(self, kind: Optional[HistoryKind] = None) -> Optional[HistoryEntry]:
+        """Return the most recent entry, optionally of a kind."""
+        for index in range(self._length - 1, -1, -1):
+            if kind is None or _KINDS[self._kinds[self._slot(index)]] == kind:
+                return self._entry(index)
+        return None
+
+    def between(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        kind: Optional[HistoryKind] = None,
+    ) -> list[HistoryEntry]:
+        """Return the entries with a timestamp from start up to and including end."""
+        timestamps = _Timestamps(self)
+        first = 0 if start is None else bisect_left(timestamps, start)
+        stop = self._length if end is None else bisect_right(timestamps, end)
+        entries = (self._entry(index) for index in range(first, stop))
+        return [entry for entry in entries if kind is None or entry.kind == kind]
+
+    def export(self) -> list[dict[str, Any]]:
+        """Return all entries as JSON serializable dicts, oldest first."""
+        return [
+            {
+                "timestamp": entry.timestamp,
+                "kind": entry.kind.value,
+                "old": entry.old,
+                "new": entry.new,
+            }
+            for entry in self
+        ]
+
+    def clear(self) -> None:
+        """Remove all entries and forget the last observed models."""
+        self._start = 0
+        self._length = 0
+        self._last = None
+        self._strings.clear()
+        self._string_ids.clear()
+        self._string_refs.clear()
+        self._free_ids.clear()
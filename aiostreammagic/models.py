@@ -4,9 +4,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import StrEnum
-from typing import Optional
+from typing import Any, Optional, get_args, get_type_hints
 
 from mashumaro import field_options
+from mashumaro.config import BaseConfig
+from mashumaro.exceptions import MissingField
 from mashumaro.mixins.orjson import DataClassORJSONMixin
 
 
@@ -48,6 +50,33 @@ class CallbackType(StrEnum):
     CONNECTION = "connection"
 
 
+class HealthState(StrEnum):
+    """Connection health state."""
+
+    HEALTHY = "healthy"
+    DEGRADED = "degraded"
+    UNHEALTHY = "unhealthy"
+
+
+class HistoryKind(StrEnum):
+    """Kind of state change recorded in the history of a zone."""
+
+    POWER = "power"
+    VOLUME = "volume"
+    MUTE = "mute"
+    SOURCE = "source"
+    PLAY_STATE = "play_state"
+    TRACK = "track"
+
+
+class CommandPriority(StrEnum):
+    """Priority class of an outbound request."""
+
+    INTERACTIVE = "interactive"
+    NORMAL = "normal"
+    BACKGROUND = "background"
+
+
 class DisplayBrightness(StrEnum):
     """Display brightness."""
 
@@ -108,8 +137,47 @@ EQ_PRESETS: dict[str, list[float]] = {
 }
 
 
+class _Model(DataClassORJSONMixin):
+    """Base class for models, compiling their decoders on first use."""
+
+    class Config(BaseConfig):
+        lazy_compilation = True
+
+
+_compiled: set[type[_Model]] = set()
+
+
+def _nested_models(hint: Any) -> list[type[_Model]]:
+    """Return the models a field type hint refers to."""
+    if isinstance(hint, type) and issubclass(hint, _Model):
+        return [hint]
+    return [model for arg in get_args(hint) for model in _nested_models(arg)]
+
+
+def compile_models(*models: type[_Model]) -> None:
+    """Compile the decoders of models, and the models they contain, now.
+
+    Decoders are otherwise compiled on first use, which would delay handling
+    the first update of frequently pushed models.
+    """
+    pending = list(models)
+    while pending:
+        model = pending.pop()
+        if model in _compiled:
+            continue
+        _compiled.add(model)
+        try:
+            # The first call compiles the decoder, which then rejects the
+            # empty payload if the model has required fields.
+            model.from_dict({})
+        except MissingField:
+            pass
+        for hint in get_type_hints(model).values():
+            pending.extend(_nested_models(hint))
+
+
 @dataclass
-class Info(DataClassORJSONMixin):
+class Info(_Model):
     """Cambridge Audio device metadata."""
 
     name: str = field(metadata=field_options(alias="name"))
@@ -122,7 +190,7 @@ class Info(DataClassORJSONMixin):
 
 
 @dataclass
-class Source(DataClassORJSONMixin):
+class Source(_Model):
     """Data class representing StreamMagic source."""
 
     id: str = field(metadata=field_options(alias="id"))
@@ -138,7 +206,7 @@ class Source(DataClassORJSONMixin):
 
 
 @dataclass
-class State(DataClassORJSONMixin):
+class State(_Model):
     """Data class representing StreamMagic state."""
 
     source: str = field(metadata=field_options(alias="source"))
@@ -170,7 +238,7 @@ class State(DataClassORJSONMixin):
 
 
 @dataclass
-class PlayStateMetadata(DataClassORJSONMixin):
+class PlayStateMetadata(_Model):
     """Data class representing StreamMagic play state metadata."""
 
     class_name: Optional[str] = field(
@@ -214,7 +282,7 @@ class PlayStateMetadata(DataClassORJSONMixin):
 
 
 @dataclass
-class PlayState(DataClassORJSONMixin):
+class PlayState(_Model):
     """Data class representing StreamMagic play state."""
 
     state: str = field(metadata=field_options(alias="state"), default="not_ready")
@@ -234,7 +302,7 @@ class PlayState(DataClassORJSONMixin):
 
 
 @dataclass
-class PresetList(DataClassORJSONMixin):
+class PresetList(_Model):
     """Data class representing StreamMagic preset table."""
 
     start: int = field(metadata=field_options(alias="start"), default=1)
@@ -249,7 +317,7 @@ class PresetList(DataClassORJSONMixin):
 
 
 @dataclass
-class Preset(DataClassORJSONMixin):
+class Preset(_Model):
     """Data class representing StreamMagic preset."""
 
     preset_id: int = field(metadata=field_options(alias="id"))
@@ -267,7 +335,7 @@ class Preset(DataClassORJSONMixin):
 
 
 @dataclass
-class NowPlaying(DataClassORJSONMixin):
+class NowPlaying(_Model):
     """Data class representing NowPlaying state."""
 
     controls: list[TransportControl] = field(
@@ -276,7 +344,7 @@ class NowPlaying(DataClassORJSONMixin):
 
 
 @dataclass
-class AudioOutput(DataClassORJSONMixin):
+class AudioOutput(_Model):
     """Data class representing StreamMagic audio output."""
 
     outputs: list[Output] = field(
@@ -285,7 +353,7 @@ class AudioOutput(DataClassORJSONMixin):
 
 
 @dataclass
-class Output(DataClassORJSONMixin):
+class Output(_Model):
     """Data class representing StreamMagic output."""
 
     id: str = field(metadata=field_options(alias="id"))
@@ -293,12 +361,12 @@ class Output(DataClassORJSONMixin):
 
 
 @dataclass
-class Display(DataClassORJSONMixin):
+class Display(_Model):
     brightness: DisplayBrightness = field(metadata=field_options(alias="brightness"))
 
 
 @dataclass
-class Update(DataClassORJSONMixin):
+class Update(_Model):
     early_update: bool = field(
         metadata=field_options(alias="early_update"), default=False
     )
@@ -309,7 +377,7 @@ class Update(DataClassORJSONMixin):
 
 
 @dataclass
-class EQBand(DataClassORJSONMixin):
+class EQBand(_Model):
     """Represents a single EQ band."""
 
     index: int = field(metadata=field_options(alias="index"))
@@ -321,8 +389,20 @@ class EQBand(DataClassORJSONMixin):
     q: Optional[float] = field(metadata=field_options(alias="q"), default=None)
 
 
+# Default band layout of the 7-band user equalizer
+DEFAULT_EQ_BANDS: list[EQBand] = [
+    EQBand(index=0, filter=EQFilterType.LOWSHELF, freq=80, gain=0.0, q=0.8),
+    EQBand(index=1, filter=EQFilterType.PEAKING, freq=120, gain=0.0, q=1.24),
+    EQBand(index=2, filter=EQFilterType.PEAKING, freq=315, gain=0.0, q=1.24),
+    EQBand(index=3, filter=EQFilterType.PEAKING, freq=800, gain=0.0, q=1.24),
+    EQBand(index=4, filter=EQFilterType.PEAKING, freq=2000, gain=0.0, q=1.24),
+    EQBand(index=5, filter=EQFilterType.PEAKING, freq=5000, gain=0.0, q=1.24),
+    EQBand(index=6, filter=EQFilterType.HIGHSHELF, freq=8000, gain=0.0, q=0.8),
+]
+
+
 @dataclass
-class UserEQ(DataClassORJSONMixin):
+class UserEQ(_Model):
     """Represents user EQ settings."""
 
     enabled: bool = field(metadata=field_options(alias="enabled"))
@@ -332,7 +412,7 @@ class UserEQ(DataClassORJSONMixin):
 
 
 @dataclass
-class TiltEQ(DataClassORJSONMixin):
+class TiltEQ(_Model):
     """Represents tilt EQ settings."""
 
     enabled: bool = field(metadata=field_options(alias="enabled"))
@@ -340,7 +420,7 @@ class TiltEQ(DataClassORJSONMixin):
 
 
 @dataclass
-class Audio(DataClassORJSONMixin):
+class Audio(_Model):
     """Represents audio settings including EQ and balance."""
 
     digital_filter: Optional[str] = field(
@@ -364,3 +444,18 @@ class Audio(DataClassORJSONMixin):
     pipeline: Optional[Pipeline] = field(
         metadata=field_options(alias="pipeline"), default=None
     )
+
+
+@dataclass
+class Scene(_Model):
+    """Target configuration of a device, applied as a diff against its state."""
+
+    power: Optional[bool] = None
+    source: Optional[str] = None
+    volume_percent: Optional[int] = None
+    mute: Optional[bool] = None
+    audio_output: Optional[str] = None
+    eq_bands: Optional[list[EQBand]] = None
+    tilt_eq_intensity: Optional[int] = None
+    balance: Optional[int] = None
+    display_brightness: Optional[DisplayBrightness] = None
@@ -0,0 +1,104 @@
+"""Priority aware scheduling of outbound StreamMagic requests."""
+
+import asyncio
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from aiostreammagic.models import CommandPriority
+from .const import MAX_IN_FLIGHT
+
+PRIORITY_WEIGHTS: dict[CommandPriority, int] = {
+    CommandPriority.INTERACTIVE: 8,
+    CommandPriority.NORMAL: 4,
+    CommandPriority.BACKGROUND: 1,
+}
+
+_current_priority: ContextVar[Optional[CommandPriority]] = ContextVar(
+    "aiostreammagic_priority", default=None
+)
+
+
+@contextmanager
+def request_priority(priority: CommandPriority) -> Iterator[None]:
+    """Send requests made within the block, and tasks created in it, at a priority."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Optional[CommandPriority]:
+    """Return the priority set by an enclosing request_priority block."""
+    return _current_priority.get()
+
+
+class CommandScheduler:
+    """Limit requests in flight and grant free slots by weighted priority."""
+
+    def __init__(
+        self,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        weights: dict[CommandPriority, int] | None = None,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self._weights = weights or PRIORITY_WEIGHTS
+        self._credits = dict(self._weights)
+        self._waiters: dict[CommandPriority, deque[asyncio.Future[None]]] = {
+            priority: deque() for priority in CommandPriority
+        }
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of requests currently in flight."""
+        return self._in_flight
+
+    @property
+    def queued(self) -> dict[CommandPriority, int]:
+        """Return the number of requests waiting for a slot per priority."""
+        return {priority: len(queue) for priority, queue in self._waiters.items()}
+
+    async def acquire(self, priority: CommandPriority) -> None:
+        """Wait for a free slot to send a request."""
+        if self._in_flight < self.max_in_flight and not any(self._waiters.values()):
+            self._in_flight += 1
+            return
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted while cancelling, hand it to the next request.
+                self.release()
+            elif waiter in self._waiters[priority]:
+                self._waiters[priority].remove(waiter)
+            raise
+
+    def release(self) -> None:
+        """Free a slot and wake the next waiting request."""
+        self._in_flight -= 1
+        while self._in_flight < self.max_in_flight:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            if waiter.done():
+                # The request was cancelled but has not run its cleanup yet.
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future[None]]:
+        """Pick the next waiter using weighted round robin between priorities."""
+        for _ in range(2):
+            for priority in CommandPriority:
+                queue = self._waiters[priority]
+                if queue and self._credits[priority] > 0:
+                    self._credits[priority] -= 1
+                    return queue.popleft()
+            self._credits = dict(self._weights)
+        return None
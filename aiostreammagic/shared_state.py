@@ -0,0 +1,198 @@
+"""Device state published to other processes through a memory-mapped table."""
+
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from aiostreammagic.exceptions import StreamMagicError
+from aiostreammagic.models import CallbackType
+
+# Header: magic, layout version, slot size, capacity
+_HEADER = struct.Struct("<4sHHI")
+_MAGIC = b"SMST"
+_LAYOUT_VERSION = 1
+# Each slot starts with a sequence counter followed by the record. The counter
+# is odd while the publisher writes the slot, so readers retry until they read
+# the same even value before and after copying the record.
+_SEQ = struct.Struct("<I")
+# host, updated, connected, power, mute, volume_percent, position, source,
+# play_state. Unknown values are stored as -1 or an empty string.
+_RECORD = struct.Struct("<64sdbbbhi32s16s")
+_SLOT_SIZE = _SEQ.size + _RECORD.size
+_SPIN_RETRIES = 100
+_READ_TIMEOUT = 1.0
+
+
+@dataclass(frozen=True)
+class DeviceRecord:
+    """Snapshot of the state of a device read from a state table."""
+
+    host: str
+    updated: float
+    connected: bool
+    power: Optional[bool]
+    mute: Optional[bool]
+    volume_percent: Optional[int]
+    position: Optional[int]
+    source: Optional[str]
+    play_state: Optional[str]
+    version: int
+
+
+def _encode(value: Optional[str], size: int) -> bytes:
+    return (value or "").encode()[:size]
+
+
+def _decode(value: bytes) -> Optional[str]:
+    return value.rstrip(b"\0").decode(errors="ignore") or None
+
+
+def _flag(value: Optional[bool]) -> int:
+    return -1 if value is None else int(value)
+
+
+class StateTable:
+    """Fixed-layout table of device state in a memory-mapped file.
+
+    One process creates the table and publishes clients to it, any number of
+    processes attach to it by path and read records without locking. A file
+    on a RAM backed filesystem such as /dev/shm keeps reads in memory.
+    """
+
+    def __init__(self, path: str, buf: mmap.mmap, owner: bool) -> None:
+        self.path = path
+        self._buf = buf
+        self._owner = owner
+        magic, version, slot_size, self.capacity = _HEADER.unpack_from(buf)
+        if magic != _MAGIC or version != _LAYOUT_VERSION or slot_size != _SLOT_SIZE:
+            raise StreamMagicError(f"{path} is not a compatible state table")
+        self._slots: dict[str, int] = {}
+        self._client_slots: dict[int, int] = {}
+
+    @classmethod
+    def create(cls, path: str, capacity: int = 64) -> "StateTable":
+        """Create a table with room for a number of devices, replacing any at path."""
+        size = _HEADER.size + capacity * _SLOT_SIZE
+        with open(path, "w+b") as file:
+            file.truncate(size)
+            buf = mmap.mmap(file.fileno(), size)
+        _HEADER.pack_into(buf, 0, _MAGIC, _LAYOUT_VERSION, _SLOT_SIZE, capacity)
+        return cls(path, buf, owner=True)
+
+    @classmethod
+    def attach(cls, path: str) -> "StateTable":
+        """Attach to a table created by another process for reading."""
+        with open(path, "rb") as file:
+            buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(path, buf, owner=False)
+
+    async def publish(self, client: Any) -> None:
+        """Write the state of a client to the table whenever it changes."""
+        self.write(client)
+
+        async def on_update(client: Any, callback_type: CallbackType) -> None:
+            self.write(client)
+
+        await client.register_state_update_callbacks(on_update)
+
+    def write(self, client: Any) -> None:
+        """Write the current state of a client to its slot."""
+        if not self._owner:
+            raise StreamMagicError("State tables can only be written by their creator")
+        slot = self._client_slots.get(id(client))
+        if slot is None:
+            if len(self._client_slots) >= self.capacity:
+                raise StreamMagicError("State table is full")
+            slot = self._client_slots[id(client)] = len(self._client_slots)
+        state = client._state
+        play_state = client._play_state
+        offset = _HEADER.size + slot * _SLOT_SIZE
+        buf = self._buf
+        (seq,) = _SEQ.unpack_from(buf, offset)
+        _SEQ.pack_into(buf, offset, seq + 1)
+        _RECORD.pack_into(
+            buf,
+            offset + _SEQ.size,
+            _encode(client.host, 64),
+            time.time(),
+            client.is_connected(),
+            _flag(state.power if state else None),
+            _flag(state.mute if state else None),
+            -1
+            if state is None or state.volume_percent is None
+            else state.volume_percent,
+            -1
+            if play_state is None or play_state.position is None
+            else play_state.position,
+            _encode(state.source if state else None, 32),
+            _encode(play_state.state if play_state else None, 16),
+        )
+        _SEQ.pack_into(buf, offset, seq + 2)
+
+    def read_slot(self, slot: int) -> Optional[DeviceRecord]:
+        """Read a consistent record from a slot, or None if the slot is unused."""
+        offset = _HEADER.size + slot * _SLOT_SIZE
+        buf = self._buf
+        attempts = 0
+        deadline = None
+        while True:
+            (before,) = _SEQ.unpack_from(buf, offset)
+            if not before & 1:
+                record = _RECORD.unpack_from(buf, offset + _SEQ.size)
+                (after,) = _SEQ.unpack_from(buf, offset)
+                if before == after:
+                    break
+            attempts += 1
+            if attempts > _SPIN_RETRIES:
+                # The writer may have been preempted mid-write, let it run.
+                deadline = deadline or time.monotonic() + _READ_TIMEOUT
+                if time.monotonic() > deadline:
+                    raise StreamMagicError("State table slot is not being released")
+                time.sleep(0)
+        if before == 0:
+            return None
+        host, updated, connected, power, mute, volume, position, source, play = record
+        return DeviceRecord(
+            host=_decode(host) or "",
+            updated=updated,
+            connected=bool(connected),
+            power=None if power < 0 else bool(power),
+            mute=None if mute < 0 else bool(mute),
+            volume_percent=None if volume < 0 else volume,
+            position=None if position < 0 else position,
+            source=_decode(source),
+            play_state=_decode(play),
+            version=before // 2,
+        )
+
+    def read(self, host: str) -> Optional[DeviceRecord]:
+        """Read the record of a host, or None if it has not been published."""
+        slot = self._slots.get(host)
+        if slot is not None:
+            record = self.read_slot(slot)
+            if record is not None and record.host == host:
+                return record
+        for record in self.records():
+            if record.host == host:
+                return record
+        return None
+
+    def records(self) -> list[DeviceRecord]:
+        """Read the records of all published devices."""
+        records = []
+        for slot in range(self.capacity):
+            record = self.read_slot(slot)
+            if record is None:
+                break
+            self._slots[record.host] = slot
+            records.append(record)
+        return records
+
+    def close(self) -> None:
+        """Detach from the table, removing it if this process created it."""
+        self._buf.close()
+        if self._owner:
+            os.unlink(self.path)
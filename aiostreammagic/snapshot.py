@@ -0,0 +1,45 @@
+"""Immutable snapshots of the cached state of a StreamMagic device."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from aiostreammagic.models import (
+    Audio,
+    AudioOutput,
+    Display,
+    Info,
+    NowPlaying,
+    PlayState,
+    PresetList,
+    Source,
+    State,
+    Update,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceSnapshot:
+    """Consistent view of the state of a zone and its device.
+
+    Snapshots are never modified. A new one with a higher version is created
+    when any part of the state changes, sharing the models that did not
+    change with the previous snapshot. The library replaces models instead of
+    mutating them, so the models of a snapshot can be handed to other threads
+    or processes as well.
+    """
+
+    version: int
+    zone_id: str
+    connected: bool
+    position_last_updated: datetime
+    info: Optional[Info] = None
+    sources: tuple[Source, ...] = ()
+    state: Optional[State] = None
+    play_state: Optional[PlayState] = None
+    now_playing: Optional[NowPlaying] = None
+    audio: Optional[Audio] = None
+    audio_output: Optional[AudioOutput] = None
+    display: Optional[Display] = None
+    update: Optional[Update] = None
+    preset_list: Optional[PresetList] = None
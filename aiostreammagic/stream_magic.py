@@ -1,103 +1,178 @@
 """Asynchronous Python client for StreamMagic API."""
 
 import asyncio
-import json
+import time
+from functools import partial
 from asyncio import AbstractEventLoop, Future, Task, Queue
-from datetime import datetime, UTC
-from typing import Any, Optional, Callable, Awaitable
+from collections import deque
+from typing import Any, Optional, Callable, Awaitable, Iterable, TypeVar
 
+import orjson
 from aiohttp import ClientWebSocketResponse, ClientSession
 
-from aiostreammagic.exceptions import StreamMagicError
+from aiostreammagic.discovery import DeviceRegistry
+from aiostreammagic.capabilities import CapabilityRegistry
+from aiostreammagic.exceptions import StreamMagicError, StreamMagicResponseError
 from aiostreammagic.models import (
     Info,
     Source,
-    State,
-    PlayState,
-    NowPlaying,
-    ShuffleMode,
-    RepeatMode,
     CallbackType,
-    AudioOutput,
+    CommandPriority,
+    HealthState,
     Display,
     DisplayBrightness,
     Update,
     PresetList,
     ControlBusMode,
     StandbyMode,
-    Audio,
-    EQBand,
-    EQFilterType,
-    EQ_PRESETS,
+    Scene,
+    State,
+    PlayState,
+    NowPlaying,
+    compile_models,
+)
+from aiostreammagic.scheduler import (
+    CommandScheduler,
+    current_priority,
+    request_priority,
 )
-from aiostreammagic.util import eq_bands_to_param_string
+from aiostreammagic.batch import StreamMagicBatch
+from aiostreammagic.buffer import CommandBuffer
+from aiostreammagic.diagnostics import Diagnostics, MessageTrace, current_trace
+from aiostreammagic.util import LazyModel, eq_bands_diff
+from aiostreammagic.wire import WireStats
+from aiostreammagic.zone import BaseZone, StreamMagicZone
 from . import endpoints as ep
-from .const import _LOGGER, WS_HEARTBEAT_TIME
+from .const import (
+    _LOGGER,
+    DEFAULT_ZONE,
+    WS_HEARTBEAT_TIME,
+    PROBE_INTERVAL,
+    PROBE_TIMEOUT,
+    PROBE_MAX_FAILURES,
+    RTT_WINDOW,
+    REQUEST_TIMEOUT,
+    MAX_IN_FLIGHT,
+    DIAGNOSTICS_SLOWEST,
+    DIAGNOSTICS_LAG_INTERVAL,
+)
+
+V = TypeVar("V")
 
 
-class StreamMagicClient:
+class StreamMagicClient(BaseZone):
     """Client for handling connections with StreamMagic enabled devices."""
 
+    _info = LazyModel(Info)
+    _display = LazyModel(Display)
+    _update = LazyModel(Update)
+    _preset_list = LazyModel(PresetList)
+
     def __init__(
         self,
         host: str,
         session: ClientSession | None = None,
         *,
         should_close_session: bool = True,
+        heartbeat: float | None = WS_HEARTBEAT_TIME,
+        probe_interval: float | None = PROBE_INTERVAL,
+        probe_timeout: float = PROBE_TIMEOUT,
+        max_probe_failures: int = PROBE_MAX_FAILURES,
+        registry: DeviceRegistry | None = None,
+        udn: str | None = None,
+        raw_models: bool = False,
+        optimistic: bool = False,
+        cache_max_age: float | None = None,
+        bootstrap_window: float | None = None,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        request_timeout: float | None = REQUEST_TIMEOUT,
+        buffer_expiry: float | None = None,
+        standby_topics: Iterable[str] | None = None,
+        history_size: int | None = None,
+        compress: int = 0,
+        capabilities: CapabilityRegistry | None = None,
+        check_controls: bool = False,
     ) -> None:
+        # Models are compiled lazily to keep imports fast, but the topics the
+        # device pushes most often are compiled before the first update.
+        compile_models(State, PlayState, NowPlaying)
+        self._history_size = history_size
+        self._init_zone(
+            DEFAULT_ZONE, raw_models, optimistic, cache_max_age, history_size
+        )
         self.host = host
         self.session: Optional[ClientSession] = session
         self._should_close_session: bool = should_close_session
         self.connection: ClientWebSocketResponse | None = None
         self.futures: dict[str, list[Future[Any]]] = {}
-        self._subscriptions: dict[str, Any] = {}
         self._loop: AbstractEventLoop = asyncio.get_running_loop()
         self.connect_result: Future[bool] | None = None
         self.connect_task: Task[Any] | None = None
-        self.state_update_callbacks: list[Any] = []
-        self._allow_state_update = False
-        self._info: Optional[Info] = None
+        self._info = None
         self.sources: list[Source] = []
-        self._state: Optional[State] = None
-        self._play_state: Optional[PlayState] = None
-        self._now_playing: Optional[NowPlaying] = None
-        self._audio: Audio | None = None
-        self._audio_output: Optional[AudioOutput] = None
-        self._display: Optional[Display] = None
-        self._update: Optional[Update] = None
-        self._preset_list: Optional[PresetList] = None
+        self._display = None
+        self._update = None
+        self._preset_list = None
         self._attempt_reconnection = False
         self._reconnect_task: Optional[Task[Any]] = None
-        self.position_last_updated: datetime = datetime.now()
         self._subscription_tasks: dict[str, asyncio.Task[Any]] = {}
+        self._subscription_queues: dict[
+            str, Queue[tuple[dict[str, Any], Optional[MessageTrace]]]
+        ] = {}
+        self.diagnostics: Optional[Diagnostics] = None
+        self._compress = compress
+        self.capabilities = capabilities
+        self._unsupported: set[str] = set()
+        self._check_controls = check_controls
+        self.wire_stats = WireStats()
+        self._heartbeat = heartbeat
+        self._probe_interval = probe_interval
+        self._probe_timeout = probe_timeout
+        self._max_probe_failures = max_probe_failures
+        self._probe_task: Optional[Task[Any]] = None
+        self._probe_failures = 0
+        self._rtt_samples: deque[float] = deque(maxlen=RTT_WINDOW)
+        self._last_message_time: Optional[float] = None
+        self._health = HealthState.UNHEALTHY
+        self._registry = registry
+        self._udn = udn
+        self._bootstrap_window = bootstrap_window
+        self.scheduler = CommandScheduler(max_in_flight)
+        self._request_timeout = request_timeout
+        self._request_timed_out = False
+        self.command_buffer: Optional[CommandBuffer] = (
+            CommandBuffer(buffer_expiry) if buffer_expiry is not None else None
+        )
+        self._flushing = False
+        self._topic_event = asyncio.Event()
+        self.time_to_ready: Optional[float] = None
+        self._zones: dict[str, StreamMagicZone] = {}
+        self._zone_tasks: set[Task[Any]] = set()
+        # Zone state is always kept, it reports when the device powers on.
+        self._standby_topics = (
+            frozenset(standby_topics) | {ep.ZONE_STATE}
+            if standby_topics is not None
+            else None
+        )
+        self._suspended: list[tuple[BaseZone, str, Any]] = []
+        self._power_lock = asyncio.Lock()
 
-    async def register_state_update_callbacks(self, callback: Any) -> None:
-        """Register state update callback."""
-        self.state_update_callbacks.append(callback)
-        if self._allow_state_update:
-            await callback(self, CallbackType.STATE)
-
-    def unregister_state_update_callbacks(self, callback: Any) -> None:
-        """Unregister state update callback."""
-        if callback in self.state_update_callbacks:
-            self.state_update_callbacks.remove(callback)
-
-    def clear_state_update_callbacks(self) -> None:
-        """Clear state update callbacks."""
-        self.state_update_callbacks.clear()
-
-    async def do_state_update_callbacks(
-        self, callback_type: CallbackType = CallbackType.STATE
-    ) -> None:
-        """Call state update callbacks."""
-        if not self.state_update_callbacks:
-            return
-        callbacks = set()
-        for callback in self.state_update_callbacks:
-            callbacks.add(callback(self, callback_type))
+    def _device(self) -> "StreamMagicClient":
+        return self
 
-        if callbacks:
-            await asyncio.gather(*callbacks)
+    def zone(self, zone_id: str) -> BaseZone:
+        """Return a handle for a zone, sharing the connection of this client."""
+        if zone_id == self.zone_id:
+            return self
+        zone = self._zones.get(zone_id)
+        if zone is None:
+            zone = StreamMagicZone(self, zone_id)
+            self._zones[zone_id] = zone
+            if self._allow_state_update and self.is_connected():
+                task = asyncio.create_task(self._async_bootstrap_zone(zone))
+                self._zone_tasks.add(task)
+                task.add_done_callback(self._zone_tasks.discard)
+        return zone
 
     async def connect(self) -> Any:
         """Connect to StreamMagic enabled devices."""
@@ -113,6 +188,12 @@ class StreamMagicClient:
     async def disconnect(self) -> None:
         """Disconnect from StreamMagic enabled devices."""
         self._attempt_reconnection = False
+        self.cancel_ramps()
+        for zone in self._zones.values():
+            zone.cancel_ramps()
+        if self.command_buffer is not None:
+            self.command_buffer.clear("Client disconnected before the command was sent")
+        await self.disable_diagnostics()
 
         if self.connection is not None and not self.connection.closed:
             await self.connection.close()
@@ -128,18 +209,49 @@ class StreamMagicClient:
             await asyncio.gather(self.connect_task, return_exceptions=True)
             self.connect_task = None
 
-        # Cancel all subscription handler tasks
-        for task in self._subscription_tasks.values():
+        for task in self._zone_tasks:
             task.cancel()
-        await asyncio.gather(*self._subscription_tasks.values(), return_exceptions=True)
-        self._subscription_tasks.clear()
+        await asyncio.gather(*self._zone_tasks, return_exceptions=True)
+
+        await self._async_stop_subscription_handlers()
         await self.do_state_update_callbacks(CallbackType.CONNECTION)
+        for zone in self._zones.values():
+            await zone.do_state_update_callbacks(CallbackType.CONNECTION)
         # Properly close the aiohttp session if it was created by this client
         if self._should_close_session and self.session is not None:
             if not self.session.closed:
                 await self.session.close()
             self.session = None
 
+    @property
+    def rtt(self) -> Optional[float]:
+        """Return the rolling average probe round trip time in seconds."""
+        if not self._rtt_samples:
+            return None
+        return sum(self._rtt_samples) / len(self._rtt_samples)
+
+    @property
+    def health(self) -> HealthState:
+        """Return the health of the connection based on liveness probes."""
+        if not self.is_connected():
+            return HealthState.UNHEALTHY
+        return self._health
+
+    @property
+    def compression(self) -> int:
+        """Return the negotiated deflate window bits, 0 if uncompressed."""
+        return self.connection.compress if self.connection is not None else 0
+
+    @property
+    def is_stale(self) -> bool:
+        """Return True if nothing has been received from the device recently."""
+        if not self.is_connected() or self._last_message_time is None:
+            return True
+        interval = self._probe_interval or self._heartbeat or WS_HEARTBEAT_TIME
+        return (
+            time.monotonic() - self._last_message_time > interval + self._probe_timeout
+        )
+
     def is_connected(self) -> bool:
         """Return True if device is connected."""
         return (
@@ -159,7 +271,8 @@ class StreamMagicClient:
                 "Origin": f"ws://{self.host}",
                 "Host": f"{self.host}:80",
             },
-            heartbeat=WS_HEARTBEAT_TIME,
+            heartbeat=self._heartbeat,
+            compress=self._compress,
         )
 
     async def _reconnect_handler(self, res: Future[bool]) -> None:
@@ -174,22 +287,51 @@ class StreamMagicClient:
                 _LOGGER.exception("StreamMagic connection handler failed")
 
             await self.do_state_update_callbacks(CallbackType.CONNECTION)
+            if self._allow_state_update:
+                # The connection was ready before it dropped, start backing off again.
+                reconnect_delay = 0.5
             if not self._attempt_reconnection:
                 _LOGGER.debug(
                     "Failed to connect to device on initial pass, skipping reconnect."
                 )
                 break
             reconnect_delay = min(reconnect_delay * 2, 30)
+            await self._async_resolve_host()
             _LOGGER.debug(
                 f"Attempting reconnection to Cambridge Audio device in {reconnect_delay} seconds..."
             )
             await asyncio.sleep(reconnect_delay)
 
+    async def _async_resolve_host(self) -> None:
+        """Re-resolve the host of the device by UDN if a registry is configured."""
+        udn = self._info.udn if self._info else self._udn
+        if self._registry is None or udn is None:
+            return
+        cached = self._registry.get(udn)
+        try:
+            host = await self._registry.async_resolve(
+                udn, force_refresh=cached is not None and cached.host == self.host
+            )
+        except OSError:
+            _LOGGER.exception("Failed to resolve StreamMagic device %s", udn)
+            return
+        if host and host != self.host:
+            _LOGGER.info(
+                "StreamMagic device %s moved from %s to %s", udn, self.host, host
+            )
+            self.host = host
+
     async def _connect_handler(self, res: Future[bool]) -> None:
         """Handle connection for StreamMagic."""
         try:
+            start = time.monotonic()
             self.futures = {}
             self._allow_state_update = False
+            self._probe_failures = 0
+            self._request_timed_out = False
+            self._rtt_samples.clear()
+            self._health = HealthState.HEALTHY
+            self._suspended.clear()
             uri = f"ws://{self.host}/smoip"
             ws = await self._ws_connect(uri)
             self.connection = ws
@@ -197,57 +339,34 @@ class StreamMagicClient:
                 self.consumer_handler(ws, self._subscriptions, self.futures)
             )
 
-            # mypy/typeshed bug: https://github.com/python/mypy/issues/17030
-            # The following ignore is safe because we know the return types.
-            (
-                self._info,
-                self.sources,
-                self._state,
-                self._play_state,
-                self._now_playing,
-                self._audio,
-                self._audio_output,
-                self._display,
-                self._update,
-                self._preset_list,
-            ) = await asyncio.gather(  # type: ignore[assignment]
-                self.get_info(),
-                self.get_sources(),
-                self.get_state(),
-                self.get_play_state(),
-                self.get_now_playing(),
-                self.get_audio(),
-                self.get_audio_output(),
-                self.get_display(),
-                self.get_update(),
-                self.get_preset_list(),
-            )
-
-            subscribe_state_updates = {
-                self.subscribe(self._async_handle_info, ep.INFO),
-                self.subscribe(self._async_handle_sources, ep.SOURCES),
-                self.subscribe(self._async_handle_zone_state, ep.ZONE_STATE),
-                self.subscribe(self._async_handle_play_state, ep.PLAY_STATE),
-                self.subscribe(self._async_handle_position, ep.POSITION),
-                self.subscribe(self._async_handle_now_playing, ep.NOW_PLAYING),
-                self.subscribe(self._async_handle_audio_output, ep.ZONE_AUDIO_OUTPUT),
-                self.subscribe(self._async_handle_display, ep.DISPLAY),
-                self.subscribe(self._async_handle_update, ep.UPDATE),
-                self.subscribe(self._async_handle_preset_list, ep.PRESET_LIST),
-                self.subscribe(self._async_handle_audio, ep.AUDIO),
-            }
-
-            subscribe_tasks = set()
-            for state_update in subscribe_state_updates:
-                subscribe_tasks.add(asyncio.create_task(state_update))
-            await asyncio.gather(*subscribe_tasks)
+            try:
+                # Replay buffered commands before anything else is sent, so
+                # that newer requests are applied after them.
+                await self._async_flush_buffer()
+                await self._async_bootstrap()
+            except BaseException:
+                # Do not leave the consumer and socket of a failed bootstrap behind.
+                x.cancel()
+                await asyncio.gather(x, return_exceptions=True)
+                await ws.close()
+                raise
             self._allow_state_update = True
+            self.time_to_ready = time.monotonic() - start
+            _LOGGER.debug("Connected to %s in %.3fs", self.host, self.time_to_ready)
             await self.do_state_update_callbacks(CallbackType.CONNECTION)
 
             self._attempt_reconnection = True
             if not res.done():
                 res.set_result(True)
-            await x
+            if self._probe_interval:
+                self._probe_task = asyncio.create_task(self._probe_handler(ws))
+            try:
+                await x
+            finally:
+                if self._probe_task:
+                    self._probe_task.cancel()
+                    await asyncio.gather(self._probe_task, return_exceptions=True)
+                    self._probe_task = None
         except asyncio.CancelledError:
             raise
         except Exception as ex:
@@ -255,16 +374,348 @@ class StreamMagicClient:
                 res.set_exception(ex)
             raise
 
-    @staticmethod
+    async def _async_bootstrap(self) -> None:
+        """Fetch the state of the device and its zones and subscribe to updates."""
+        fetchers = self._fetchers()
+        if self.capabilities is not None:
+            # The model decides which topics exist, so info is fetched first.
+            with request_priority(CommandPriority.BACKGROUND):
+                self._info = await self.get_info(force=True)
+            del fetchers[ep.INFO]
+            self._unsupported = set(self.capabilities.unsupported(self._info))
+        topics = {
+            ep.INFO: self._async_handle_info,
+            ep.SOURCES: self._async_handle_sources,
+            ep.DISPLAY: self._async_handle_display,
+            ep.UPDATE: self._async_handle_update,
+            ep.PRESET_LIST: self._async_handle_preset_list,
+            **self._zone_topics(),
+        }
+        fetchers = self._supported(fetchers)
+        if self._bootstrap_window is None:
+            await self._async_fetch_topics(fetchers)
+            # Responses are matched to requests by path, so zones fetch their
+            # topics before the client subscriptions on the same paths are
+            # acknowledged.
+            await self._async_bootstrap_zones()
+            await self._async_subscribe_topics(self._supported(topics))
+        else:
+            # Rely on the initial data pushed for each subscription and only
+            # fall back to a request for topics that did not arrive in time.
+            await self._async_subscribe_topics(self._supported(topics))
+            await self._async_wait_for_topics(fetchers, self._bootstrap_window)
+            await self._async_fetch_topics(
+                {
+                    path: fetcher
+                    for path, fetcher in fetchers.items()
+                    if path not in self._topic_updated
+                }
+            )
+            await self._async_bootstrap_zones()
+        await self._async_apply_power_policy()
+
+    async def _async_flush_buffer(self) -> None:
+        """Send the requests buffered while reconnecting, in the order they were made.
+
+        Requests made during the flush are buffered as well and sent after the
+        older ones, so a stale buffered value cannot override a newer one.
+        """
+        if self.command_buffer is None:
+            return
+        self._flushing = True
+        try:
+            while len(self.command_buffer):
+                commands = self.command_buffer.drain()
+                _LOGGER.debug(
+                    "Replaying %s buffered commands to %s", len(commands), self.host
+                )
+                results = await asyncio.gather(
+                    *(
+                        self._scheduled_request(
+                            command.path, command.params, CommandPriority.INTERACTIVE
+                        )
+                        for command in commands
+                    ),
+                    return_exceptions=True,
+                )
+                for command, result in zip(commands, results):
+                    for future in command.futures:
+                        if future.done():
+                            continue
+                        if isinstance(result, BaseException):
+                            future.set_exception(result)
+                        else:
+                            future.set_result(result)
+        finally:
+            self._flushing = False
+
+    async def _async_bootstrap_zone(self, zone: StreamMagicZone) -> None:
+        """Bootstrap a zone, marking it unavailable if the device rejects it.
+
+        A failed zone does not fail the connection, it is retried on reconnect.
+        """
+        try:
+            await zone._async_bootstrap()
+        except StreamMagicError as ex:
+            _LOGGER.warning(
+                "Zone %s of %s is unavailable: %s", zone.zone_id, self.host, ex
+            )
+            zone.available = False
+            await zone.do_state_update_callbacks(CallbackType.CONNECTION)
+        else:
+            zone.available = True
+
+    async def _async_bootstrap_zones(self) -> None:
+        """Fetch and subscribe to the state of each additional zone."""
+        await asyncio.gather(
+            *(self._async_bootstrap_zone(zone) for zone in self._zones.values())
+        )
+
+    def _fetchers(self) -> dict[str, tuple[str, Callable[..., Awaitable[Any]]]]:
+        """Return the attribute and getter used to fetch each topic, keyed by path."""
+        return {
+            ep.INFO: ("_info", self.get_info),
+            ep.SOURCES: ("sources", self.get_sources),
+            **self._zone_fetchers(),
+            ep.DISPLAY: ("_display", self.get_display),
+            ep.UPDATE: ("_update", self.get_update),
+            ep.PRESET_LIST: ("_preset_list", self.get_preset_list),
+        }
+
+    async def _async_apply_power_policy(self) -> None:
+        """Scale subscriptions down in standby and back up when powered on."""
+        if self._standby_topics is None or self._state is None:
+            return
+        async with self._power_lock:
+            try:
+                if not self.state.power and not self._suspended:
+                    await self._async_suspend_topics()
+                elif self.state.power and self._suspended:
+                    await self._async_resume_topics()
+            except StreamMagicError as ex:
+                # This runs in the zone state handler, which must survive. The
+                # topics left suspended are retried on the next state update.
+                _LOGGER.warning(
+                    "Failed to apply the power policy of %s: %s", self.host, ex
+                )
+
+    async def _async_suspend_topics(self) -> None:
+        """Unsubscribe from every topic not needed while the device is in standby."""
+        assert self._standby_topics is not None
+        for zone in (self, *self._zones.values()):
+            for path in list(zone._subscriptions):
+                if path in self._standby_topics:
+                    continue
+                callback = zone._subscriptions.pop(path)
+                zone._topic_updated.pop(path, None)
+                await self._async_stop_subscription_handlers(
+                    [self._subscription_key(zone, path)]
+                )
+                self._suspended.append((zone, path, callback))
+                await self._send_unawaited(path, {"update": 0, "zone": zone.zone_id})
+        _LOGGER.debug(
+            "%s is in standby, suspended %s subscriptions",
+            self.host,
+            len(self._suspended),
+        )
+
+    async def _async_resume_topics(self) -> None:
+        """Refresh and resubscribe to the topics suspended during standby.
+
+        A topic that fails to refresh keeps its previous model until the
+        subscription pushes it. Topics that fail to resubscribe stay suspended.
+        """
+        suspended = list(self._suspended)
+        _LOGGER.debug(
+            "%s powered on, resuming %s subscriptions", self.host, len(suspended)
+        )
+        for zone in (self, *self._zones.values()):
+            paths = {path for owner, path, _ in suspended if owner is zone}
+            fetchers = self._fetchers() if zone is self else zone._zone_fetchers()
+            await self._async_fetch_topics(
+                {path: fetcher for path, fetcher in fetchers.items() if path in paths},
+                zone,
+                strict=False,
+            )
+        results = await asyncio.gather(
+            *(
+                self.subscribe(callback, path, zone=zone)
+                for zone, path, callback in suspended
+            ),
+            return_exceptions=True,
+        )
+        self._suspended = [
+            topic
+            for topic, result in zip(suspended, results)
+            if isinstance(result, BaseException)
+        ]
+        await self.do_state_update_callbacks()
+        if self._suspended:
+            raise StreamMagicError(
+                f"Failed to resume {len(self._suspended)} subscriptions"
+            )
+
+    async def _async_subscribe_topics(self, topics: dict[str, Any]) -> None:
+        """Subscribe to updates for each topic."""
+        await asyncio.gather(
+            *(self.subscribe(callback, path) for path, callback in topics.items())
+        )
+
+    async def _async_fetch_topics(
+        self,
+        fetchers: dict[str, tuple[str, Callable[..., Awaitable[Any]]]],
+        zone: BaseZone | None = None,
+        strict: bool = True,
+    ) -> None:
+        """Request topics from the device and store them in the cache.
+
+        Errors are raised, unless strict is False, then they are logged and
+        the topic is skipped.
+        """
+        with request_priority(CommandPriority.BACKGROUND):
+            results = await asyncio.gather(
+                *(getter(force=True) for _, getter in fetchers.values()),
+                return_exceptions=True,
+            )
+        for (path, (attr, _)), result in zip(fetchers.items(), results):
+            if isinstance(result, BaseException):
+                if self._learn_unsupported(path, result):
+                    # Do not keep the model of a previous connection.
+                    setattr(zone or self, attr, None)
+                    continue
+                if strict or not isinstance(result, StreamMagicError):
+                    raise result
+                _LOGGER.debug("Failed to fetch %s from %s: %s", path, self.host, result)
+                continue
+            if self.capabilities is not None and self._info is not None:
+                self.capabilities.record_success(self._info, path)
+            setattr(zone or self, attr, result)
+
+    def _supported(self, topics: dict[str, V]) -> dict[str, V]:
+        """Return the topics not known to be unsupported by the device."""
+        if not self._unsupported:
+            return topics
+        return {
+            path: topic
+            for path, topic in topics.items()
+            if path not in self._unsupported
+        }
+
+    def _learn_unsupported(self, path: str, ex: BaseException) -> bool:
+        """Skip an optional topic the device answered with an error.
+
+        The topic is only recorded as unsupported, and skipped on later
+        bootstraps, once it has failed on several bootstraps in a row.
+        """
+        if (
+            self.capabilities is None
+            or self._info is None
+            or path not in ep.OPTIONAL_TOPICS
+            or not isinstance(ex, StreamMagicResponseError)
+        ):
+            return False
+        _LOGGER.debug("%s failed to fetch %s: %s", self.host, path, ex)
+        if self.capabilities.record_failure(self._info, path):
+            self._unsupported.add(path)
+        return True
+
+    async def _async_wait_for_topics(
+        self, paths: Iterable[str], timeout: float
+    ) -> None:
+        """Wait until data for every topic has been received or the timeout expires."""
+        deadline = time.monotonic() + timeout
+        while any(path not in self._topic_updated for path in paths):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._topic_event.clear()
+            try:
+                await asyncio.wait_for(self._topic_event.wait(), remaining)
+            except TimeoutError:
+                return
+
+    async def _async_handle_subscription(
+        self,
+        zone: BaseZone,
+        callback: Callable[[dict[str, Any]], Awaitable[None]],
+        msg: dict[str, Any],
+    ) -> None:
+        """Pass a message to a subscription handler and record when its topic updated."""
+        await callback(msg)
+        if "data" in msg.get("params", {}):
+            zone._topic_updated[msg["path"]] = time.monotonic()
+            self._topic_event.set()
+            if (
+                zone is self
+                and msg["path"] == ep.ZONE_STATE
+                and self._allow_state_update
+            ):
+                await self._async_apply_power_policy()
+
+    async def _probe_handler(self, ws: ClientWebSocketResponse) -> None:
+        """Periodically probe the device and drop the connection if it stops answering."""
+        assert self._probe_interval is not None
+        while not ws.closed:
+            await asyncio.sleep(self._probe_interval)
+            start = time.monotonic()
+            try:
+                # Probes bypass the scheduler, so time spent queued behind
+                # other requests counts neither against the timeout nor as RTT.
+                await asyncio.wait_for(self._request(ep.INFO), self._probe_timeout)
+            except (TimeoutError, StreamMagicError) as ex:
+                self._probe_failures += 1
+                _LOGGER.debug(
+                    "Liveness probe to %s failed (%s/%s): %s",
+                    self.host,
+                    self._probe_failures,
+                    self._max_probe_failures,
+                    ex,
+                )
+            else:
+                self._probe_failures = 0
+                self._rtt_samples.append(time.monotonic() - start)
+
+            if self._probe_failures >= self._max_probe_failures:
+                _LOGGER.warning(
+                    "StreamMagic device %s stopped responding, reconnecting", self.host
+                )
+                await self._set_health(HealthState.UNHEALTHY)
+                await ws.close()
+                return
+            await self._set_health(
+                HealthState.DEGRADED
+                if self._probe_failures or self._request_timed_out
+                else HealthState.HEALTHY
+            )
+
+    async def _set_health(self, health: HealthState) -> None:
+        """Update the health state and notify callbacks when it changes."""
+        if health == self._health:
+            return
+        self._health = health
+        await self.do_state_update_callbacks(CallbackType.CONNECTION)
+
     async def subscription_handler(
-        queue: Queue[dict[str, Any]],
+        self,
+        queue: Queue[tuple[dict[str, Any], Optional[MessageTrace]]],
         callback: Callable[[dict[str, Any]], Awaitable[None]],
     ) -> None:
         """Handle subscriptions."""
         try:
             while True:
-                msg = await queue.get()
-                await callback(msg)
+                msg, trace = await queue.get()
+                if trace is None:
+                    await callback(msg)
+                    continue
+                trace.add("queue", trace.lap())
+                token = current_trace.set(trace)
+                try:
+                    await callback(msg)
+                finally:
+                    current_trace.reset(token)
+                trace.add("handle", trace.lap() - trace.stages.get("callbacks", 0.0))
+                if self.diagnostics is not None:
+                    self.diagnostics.finish(trace)
         except asyncio.CancelledError:
             pass
 
@@ -275,35 +726,64 @@ class StreamMagicClient:
         futures: dict[str, list[asyncio.Future[Any]]],
     ) -> None:
         """Callback consumer handler."""
-        subscription_queues: dict[str, Queue[dict[str, Any]]] = {}
         try:
+            waiting = time.perf_counter()
             async for raw_msg in ws:
                 try:
+                    self._last_message_time = time.monotonic()
+                    diagnostics = self.diagnostics
+                    trace = None
+                    if diagnostics is not None:
+                        received = time.perf_counter()
+                        diagnostics.stages["receive"].add(received - waiting)
                     if futures or subscriptions:
                         _LOGGER.debug("recv(%s): %s", self.host, raw_msg)
-                        msg = json.loads(raw_msg.data)
+                        msg = orjson.loads(raw_msg.data)
                         path = msg["path"]
-                        path_futures = self.futures.get(path)
-                        subscription = self._subscriptions.get(path)
+                        if diagnostics is not None:
+                            trace = MessageTrace(path, received)
+                            trace.add("decode", trace.lap())
+                        # Text frames are counted in characters rather than
+                        # encoded again, which only differs for non-ASCII text.
+                        self.wire_stats.add_received(path, len(raw_msg.data))
+                        path_futures = futures.get(path)
+                        zone = self._message_zone(msg)
+                        subscription = zone._subscriptions.get(path)
+                        key = self._subscription_key(zone, path)
                         if path_futures and msg.get("type") == "response":
-                            for future in path_futures:
-                                if not future.done():
-                                    future.set_result(msg)
+                            # The device answers requests on a path in order, so
+                            # each response belongs to the oldest pending request.
+                            # Cancelled requests stay in the list until their
+                            # response arrives, which is then dropped.
+                            future = path_futures.pop(0)
+                            if not future.done():
+                                future.set_result(msg)
+                            if not path_futures and futures.get(path) is path_futures:
+                                del futures[path]
+                            # Responses to explicit requests (such as liveness
+                            # probes) are not treated as subscription updates.
+                            subscription = None
+                        if trace is not None:
+                            trace.add("resolve", trace.lap())
                         if subscription:
-                            queue = subscription_queues.get(path)
+                            queue = self._subscription_queues.get(key)
                             if queue is None:
                                 queue = asyncio.Queue()
-                                subscription_queues[path] = queue
-                                old_task = self._subscription_tasks.pop(path, None)
-                                if old_task:
-                                    old_task.cancel()
-                                    await asyncio.gather(
-                                        old_task, return_exceptions=True
+                                self._subscription_queues[key] = queue
+                                self._subscription_tasks[key] = asyncio.create_task(
+                                    self.subscription_handler(
+                                        queue,
+                                        partial(
+                                            self._async_handle_subscription,
+                                            zone,
+                                            subscription,
+                                        ),
                                     )
-                                self._subscription_tasks[path] = asyncio.create_task(
-                                    self.subscription_handler(queue, subscription)
                                 )
-                            queue.put_nowait(msg)
+                            queue.put_nowait((msg, trace))
+                        elif diagnostics is not None and trace is not None:
+                            diagnostics.finish(trace)
+                    waiting = time.perf_counter()
                 except Exception:
                     _LOGGER.exception(
                         "Failed handling StreamMagic websocket message: %s", raw_msg
@@ -317,14 +797,12 @@ class StreamMagicClient:
         finally:
             if self.connection is ws:
                 self.connection = None
-            for task in self._subscription_tasks.values():
-                task.cancel()
-            await asyncio.gather(
-                *self._subscription_tasks.values(), return_exceptions=True
-            )
-            self._subscription_tasks.clear()
+            self._topic_updated.clear()
+            for zone in self._zones.values():
+                zone._topic_updated.clear()
+            await self._async_stop_subscription_handlers()
 
-            for path_futures in self.futures.values():
+            for path_futures in futures.values():
                 for future in path_futures:
                     if not future.done():
                         future.set_exception(
@@ -332,7 +810,34 @@ class StreamMagicClient:
                                 "StreamMagic consumer stopped before response was received"
                             )
                         )
-            self.futures.clear()
+            futures.clear()
+
+    def _subscription_key(self, zone: BaseZone, path: str) -> str:
+        """Return the key of the subscription handler of a zone and path."""
+        return path if zone is self else f"{zone.zone_id}:{path}"
+
+    async def _async_stop_subscription_handlers(
+        self, keys: Optional[Iterable[str]] = None
+    ) -> None:
+        """Cancel subscription handler tasks and drop their queues."""
+        keys = list(self._subscription_tasks if keys is None else keys)
+        tasks = [
+            task for key in keys if (task := self._subscription_tasks.pop(key, None))
+        ]
+        for key in keys:
+            self._subscription_queues.pop(key, None)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _message_zone(self, msg: dict[str, Any]) -> BaseZone:
+        """Return the zone a message from the device belongs to."""
+        params = msg.get("params")
+        if self._zones and isinstance(params, dict):
+            zone = self._zones.get(params.get("zone", self.zone_id))
+            if zone is not None:
+                return zone
+        return self
 
     async def _send(
         self, path: str, params: Optional[dict[str, str | int | float | bool]] = None
@@ -347,40 +852,169 @@ class StreamMagicClient:
             raise StreamMagicError("Not connected to device.")
 
         _LOGGER.debug("Sending command: %s", message)
-        await self.connection.send_str(json.dumps(message))
+        data = orjson.dumps(message)
+        self.wire_stats.add_sent(path, len(data))
+        await self.connection.send_str(data.decode())
+
+    async def _send_unawaited(
+        self, path: str, params: Optional[dict[str, str | int | float | bool]] = None
+    ) -> None:
+        """Send a command whose response nobody waits for.
+
+        The device still answers it, so a placeholder takes its place among
+        the pending requests on the path and the response is dropped.
+        """
+        placeholder = self._loop.create_future()
+        placeholder.cancel()
+        futures = self.futures
+        path_futures = futures.setdefault(path, [])
+        path_futures.append(placeholder)
+        try:
+            await self._send(path, params)
+        except BaseException:
+            if placeholder in path_futures:
+                path_futures.remove(placeholder)
+                if not path_futures and futures.get(path) is path_futures:
+                    del futures[path]
+            raise
 
     async def request(
+        self,
+        path: str,
+        params: Optional[dict[str, str | int | float | bool]] = None,
+        priority: Optional[CommandPriority] = None,
+    ) -> Any:
+        """Send a request to the device and return the response.
+
+        Requests without an explicit priority inherit the priority of an enclosing
+        request_priority block, otherwise commands are sent as interactive and
+        queries as normal. With a buffer_expiry, requests made while the client
+        is reconnecting are buffered and sent once the connection is ready.
+        """
+        if self.command_buffer is not None and (
+            (self.connection is None and self._attempt_reconnection) or self._flushing
+        ):
+            return await self.command_buffer.add(path, params)
+        return await self._scheduled_request(path, params, priority)
+
+    async def _scheduled_request(
+        self,
+        path: str,
+        params: Optional[dict[str, str | int | float | bool]] = None,
+        priority: Optional[CommandPriority] = None,
+    ) -> Any:
+        """Send a request once the scheduler frees a slot for its priority."""
+        priority = priority or current_priority()
+        if priority is None:
+            is_command = any(key != "zone" for key in params or {})
+            priority = (
+                CommandPriority.INTERACTIVE if is_command else CommandPriority.NORMAL
+            )
+        await self.scheduler.acquire(priority)
+        try:
+            # Free the slot of a request the device never answers, so that
+            # unanswered requests cannot stall all others.
+            response = await asyncio.wait_for(
+                self._request(path, params), self._request_timeout
+            )
+        except TimeoutError as ex:
+            self._request_timed_out = True
+            await self._set_health(HealthState.DEGRADED)
+            raise StreamMagicError(
+                f"No response to {path} within {self._request_timeout}s"
+            ) from ex
+        finally:
+            self.scheduler.release()
+        self._request_timed_out = False
+        return response
+
+    async def _request(
         self, path: str, params: Optional[dict[str, str | int | float | bool]] = None
     ) -> Any:
+        """Send a request and wait for the matching response."""
         res = self._loop.create_future()
-        path_futures = self.futures.get(path, [])
+        futures = self.futures
+        path_futures = futures.setdefault(path, [])
         path_futures.append(res)
-        self.futures[path] = path_futures
+        sent = False
         try:
             await self._send(path, params)
-        except (asyncio.CancelledError, StreamMagicError):
-            path_futures.remove(res)
-            raise
-        try:
+            sent = True
             response = await res
-        except asyncio.CancelledError:
-            if res in path_futures:
+        finally:
+            # The consumer removes the future when the response arrives. A
+            # request cancelled after it was sent keeps its place until then,
+            # so its late response is not matched to the next request.
+            if res in path_futures and not (sent and res.cancelled()):
                 path_futures.remove(res)
-            raise
-        path_futures.remove(res)
+                # Drop the entry of idle paths so the table does not keep one
+                # list for every path ever requested.
+                if not path_futures and futures.get(path) is path_futures:
+                    del futures[path]
         message = response["message"]
         result = response["result"]
         if result != 200:
-            raise StreamMagicError(message)
+            raise StreamMagicResponseError(message, result)
 
         return response
 
-    async def subscribe(self, callback: Any, path: str) -> Any:
-        self._subscriptions[path] = callback
+    async def execute_many(
+        self,
+        commands: Iterable[tuple[str, Optional[dict[str, str | int | float | bool]]]],
+        priority: Optional[CommandPriority] = None,
+    ) -> list[Any]:
+        """Send requests back-to-back without waiting for each response.
+
+        Requests are sent in the given order, so requests on the same path are
+        applied by the device in order. Returns the response or the raised
+        exception of each request, in the same order as the commands.
+        """
+        return await asyncio.gather(
+            *(self.request(path, params, priority) for path, params in commands),
+            return_exceptions=True,
+        )
+
+    async def enable_diagnostics(
+        self,
+        slowest: int = DIAGNOSTICS_SLOWEST,
+        lag_interval: float = DIAGNOSTICS_LAG_INTERVAL,
+        log_interval: Optional[float] = None,
+    ) -> None:
+        """Start timing message handling and sampling event loop lag.
+
+        The measurements are available from diagnostics_summary() and, with a
+        log_interval, logged periodically until diagnostics are disabled or the
+        client disconnects.
+        """
+        await self.disable_diagnostics()
+        self.diagnostics = Diagnostics(slowest, lag_interval, log_interval)
+        self.diagnostics.start()
+
+    async def disable_diagnostics(self) -> Optional[dict[str, Any]]:
+        """Stop diagnostics and return the final summary, if they were enabled."""
+        diagnostics, self.diagnostics = self.diagnostics, None
+        if diagnostics is None:
+            return None
+        await diagnostics.stop()
+        return diagnostics.summary()
+
+    async def diagnostics_summary(self) -> Optional[dict[str, Any]]:
+        """Return the diagnostics collected so far, or None if not enabled."""
+        return self.diagnostics.summary() if self.diagnostics is not None else None
+
+    def batch(self, priority: Optional[CommandPriority] = None) -> StreamMagicBatch:
+        """Return a context manager that collects requests and sends them on exit."""
+        return StreamMagicBatch(self, priority)
+
+    async def subscribe(
+        self, callback: Any, path: str, zone: BaseZone | None = None
+    ) -> Any:
+        zone = zone or self
+        zone._subscriptions[path] = callback
         try:
-            await self._send(path, {"update": 100, "zone": "ZONE1"})
+            await self._send_unawaited(path, {"update": 100, "zone": zone.zone_id})
         except (asyncio.CancelledError, StreamMagicError):
-            del self._subscriptions[path]
+            del zone._subscriptions[path]
             raise
 
     @property
@@ -390,41 +1024,6 @@ class StreamMagicClient:
             raise StreamMagicError("Info not available.")
         return self._info
 
-    @property
-    def state(self) -> State:
-        """Return a type-guaranteed instance of State"""
-        if not self._state:
-            raise StreamMagicError("State not available.")
-        return self._state
-
-    @property
-    def play_state(self) -> PlayState:
-        """Return a type-guaranteed instance of PlayState"""
-        if not self._play_state:
-            raise StreamMagicError("Play state not available.")
-        return self._play_state
-
-    @property
-    def now_playing(self) -> NowPlaying:
-        """Return a type-guaranteed instance of NowPlaying"""
-        if not self._now_playing:
-            raise StreamMagicError("NowPlaying not available.")
-        return self._now_playing
-
-    @property
-    def audio(self) -> Audio:
-        """Return a type-guaranteed instance of Audio"""
-        if not self._audio:
-            raise StreamMagicError("Audio not available.")
-        return self._audio
-
-    @property
-    def audio_output(self) -> AudioOutput:
-        """Return a type-guaranteed instance of AudioOutput"""
-        if not self._audio_output:
-            raise StreamMagicError("AudioOutput not available.")
-        return self._audio_output
-
     @property
     def display(self) -> Display:
         """Return a type-guaranteed instance of Display"""
@@ -446,62 +1045,57 @@ class StreamMagicClient:
             raise StreamMagicError("PresetList not available.")
         return self._preset_list
 
-    async def get_info(self) -> Info:
+    async def get_info(self, force: bool = False) -> Info:
         """Get device information from device."""
+        if (cached := self._cached(ep.INFO, self._info, force)) is not None:
+            return cached
         data = await self.request(ep.INFO)
-        return Info.from_dict(data["params"]["data"])
+        return self._store(ep.INFO, "_info", Info.from_dict(data["params"]["data"]))
 
-    async def get_sources(self) -> list[Source]:
+    async def get_sources(self, force: bool = False) -> list[Source]:
         """Get source information from device."""
+        if (
+            cached := self._cached(ep.SOURCES, self.sources or None, force)
+        ) is not None:
+            return cached
         data = await self.request(ep.SOURCES)
         sources = [Source.from_dict(x) for x in data["params"]["data"]["sources"]]
-        return sources
-
-    async def get_state(self) -> State:
-        """Get state information from device."""
-        data = await self.request(ep.ZONE_STATE)
-        return State.from_dict(data["params"]["data"])
-
-    async def get_play_state(self) -> PlayState:
-        """Get play state information from device."""
-        data = await self.request(ep.PLAY_STATE)
-        return PlayState.from_dict(data["params"]["data"])
-
-    async def get_now_playing(self) -> NowPlaying:
-        """Get now playing information from device."""
-        data = await self.request(ep.NOW_PLAYING)
-        return NowPlaying.from_dict(data["params"]["data"])
-
-    async def get_audio(self) -> Audio | None:
-        """Get audio information from device."""
-        data = await self.request(ep.AUDIO)
-        return Audio.from_dict(data["params"]["data"])
-
-    async def get_audio_output(self) -> AudioOutput:
-        """Get audio output information from device."""
-        data = await self.request(ep.ZONE_AUDIO_OUTPUT)
-        return AudioOutput.from_dict(data["params"]["data"])
-
-    async def get_display(self) -> Display:
+        return self._store(ep.SOURCES, "sources", sources)
+
+    async def get_display(self, force: bool = False) -> Display:
         """Get display information from device."""
+        if (cached := self._cached(ep.DISPLAY, self._display, force)) is not None:
+            return cached
         data = await self.request(ep.DISPLAY)
-        return Display.from_dict(data["params"]["data"])
+        return self._store(
+            ep.DISPLAY, "_display", Display.from_dict(data["params"]["data"])
+        )
 
-    async def get_update(self) -> Update:
+    async def get_update(self, force: bool = False) -> Update:
         """Get display information from device."""
+        if (cached := self._cached(ep.UPDATE, self._update, force)) is not None:
+            return cached
         data = await self.request(ep.UPDATE)
-        return Update.from_dict(data["params"]["data"])
+        return self._store(
+            ep.UPDATE, "_update", Update.from_dict(data["params"]["data"])
+        )
 
-    async def get_preset_list(self) -> PresetList:
+    async def get_preset_list(self, force: bool = False) -> PresetList:
         """Get preset list information from device."""
+        if (
+            cached := self._cached(ep.PRESET_LIST, self._preset_list, force)
+        ) is not None:
+            return cached
         data = await self.request(ep.PRESET_LIST)
-        return PresetList.from_dict(data["params"]["data"])
+        return self._store(
+            ep.PRESET_LIST, "_preset_list", PresetList.from_dict(data["params"]["data"])
+        )
 
     async def _async_handle_info(self, payload: dict[str, Any]) -> None:
         """Handle async info update."""
         params = payload["params"]
         if "data" in params:
-            self._info = Info.from_dict(params["data"])
+            self._info = self._decode(Info, params["data"])
         await self.do_state_update_callbacks()
 
     async def _async_handle_sources(self, payload: dict[str, Any]) -> None:
@@ -511,69 +1105,25 @@ class StreamMagicClient:
             self.sources = [Source.from_dict(x) for x in params["data"]["sources"]]
         await self.do_state_update_callbacks()
 
-    async def _async_handle_zone_state(self, payload: dict[str, Any]) -> None:
-        """Handle async zone state update."""
-        params = payload["params"]
-        if "data" in params:
-            self._state = State.from_dict(params["data"])
-        await self.do_state_update_callbacks()
-
-    async def _async_handle_play_state(self, payload: dict[str, Any]) -> None:
-        """Handle async zone state update."""
-        params = payload["params"]
-        if "data" in params:
-            self._play_state = PlayState.from_dict(params["data"])
-            self.position_last_updated = datetime.now()
-        await self.do_state_update_callbacks()
-
-    async def _async_handle_position(self, payload: dict[str, Any]) -> None:
-        """Handle async position update."""
-        params = payload["params"]
-        if "data" in params and params["data"]["position"] and self.play_state:
-            self.play_state.position = params["data"]["position"]
-            self.position_last_updated = datetime.now(UTC)
-        await self.do_state_update_callbacks()
-
-    async def _async_handle_now_playing(self, payload: dict[str, Any]) -> None:
-        """Handle async now playing update."""
-        params = payload["params"]
-        if "data" in params:
-            self._now_playing = NowPlaying.from_dict(params["data"])
-        await self.do_state_update_callbacks()
-
-    async def _async_handle_audio(self, payload: dict[str, Any]) -> None:
-        """Handle async audio update."""
-        params = payload["params"]
-        if "data" in params:
-            self._audio = Audio.from_dict(params["data"])
-        await self.do_state_update_callbacks()
-
-    async def _async_handle_audio_output(self, payload: dict[str, Any]) -> None:
-        """Handle async audio output update."""
-        params = payload["params"]
-        if "data" in params:
-            self._audio_output = AudioOutput.from_dict(params["data"])
-        await self.do_state_update_callbacks()
-
     async def _async_handle_display(self, payload: dict[str, Any]) -> None:
         """Handle async display update."""
         params = payload["params"]
         if "data" in params:
-            self._display = Display.from_dict(params["data"])
+            self._display = self._decode(Display, params["data"])
         await self.do_state_update_callbacks()
 
     async def _async_handle_update(self, payload: dict[str, Any]) -> None:
         """Handle async display update."""
         params = payload["params"]
         if "data" in params:
-            self._update = Update.from_dict(params["data"])
+            self._update = self._decode(Update, params["data"])
         await self.do_state_update_callbacks()
 
     async def _async_handle_preset_list(self, payload: dict[str, Any]) -> None:
         """Handle async preset list update."""
         params = payload["params"]
         if "data" in params:
-            self._preset_list = PresetList.from_dict(params["data"])
+            self._preset_list = self._decode(PresetList, params["data"])
         await self.do_state_update_callbacks()
 
     async def power_on(self) -> None:
@@ -584,229 +1134,10 @@ class StreamMagicClient:
         """Set the power of the device to network."""
         await self.request(ep.POWER, params={"power": "NETWORK"})
 
-    async def volume_up(self) -> None:
-        """Increase the volume of the device by 1."""
-        await self.request(
-            ep.ZONE_STATE, params={"zone": "ZONE1", "volume_step_change": 1}
-        )
-
-    async def volume_down(self) -> None:
-        """Increase the volume of the device by -1."""
-        await self.request(
-            ep.ZONE_STATE, params={"zone": "ZONE1", "volume_step_change": -1}
-        )
-
-    async def set_volume(self, volume: int) -> None:
-        """Set the volume of the device."""
-        if not 0 <= volume <= 100:
-            raise StreamMagicError("Volume must be between 0 and 100")
-        await self.request(
-            ep.ZONE_STATE, params={"zone": "ZONE1", "volume_percent": volume}
-        )
-
-    async def set_mute(self, mute: bool) -> None:
-        """Set the mute of the device."""
-        await self.request(ep.ZONE_STATE, params={"zone": "ZONE1", "mute": mute})
-
-    async def set_source(self, source: Source) -> None:
-        """Set the source of the device."""
-        await self.set_source_by_id(source.id)
-
-    async def set_source_by_id(self, source_id: str) -> None:
-        """Set the source of the device."""
-        await self.request(ep.ZONE_STATE, params={"zone": "ZONE1", "source": source_id})
-
-    async def media_seek(self, position: int) -> None:
-        """Set the media position of the device."""
-        await self.request(
-            ep.PLAY_CONTROL, params={"zone": "ZONE1", "position": position}
-        )
-
-    async def next_track(self) -> None:
-        """Skip the next track."""
-        await self.request(
-            ep.PLAY_CONTROL, params={"match": "none", "zone": "ZONE1", "skip_track": 1}
-        )
-
-    async def previous_track(self) -> None:
-        """Skip the next track."""
-        await self.request(
-            ep.PLAY_CONTROL, params={"match": "none", "zone": "ZONE1", "skip_track": -1}
-        )
-
-    async def play_pause(self) -> None:
-        """Toggle play/pause."""
-        await self.request(
-            ep.PLAY_CONTROL,
-            params={"match": "none", "zone": "ZONE1", "action": "toggle"},
-        )
-
-    async def play(self) -> None:
-        """Play the device."""
-        await self.request(
-            ep.PLAY_CONTROL,
-            params={"match": "none", "zone": "ZONE1", "action": "play"},
-        )
-
-    async def pause(self) -> None:
-        """Pause the device."""
-        await self.request(
-            ep.PLAY_CONTROL,
-            params={"match": "none", "zone": "ZONE1", "action": "pause"},
-        )
-
-    async def stop(self) -> None:
-        """Pause the device."""
-        await self.request(
-            ep.PLAY_CONTROL, params={"match": "none", "zone": "ZONE1", "action": "stop"}
-        )
-
-    async def set_shuffle(self, shuffle: ShuffleMode) -> None:
-        """Set the shuffle of the device."""
-        await self.request(
-            ep.PLAY_CONTROL,
-            params={"match": "none", "zone": "ZONE1", "mode_shuffle": shuffle},
-        )
-
-    async def set_repeat(self, repeat: RepeatMode) -> None:
-        """Set the repeat of the device."""
-        await self.request(
-            ep.PLAY_CONTROL,
-            params={"match": "none", "zone": "ZONE1", "mode_repeat": repeat},
-        )
-
-    async def play_radio_airable(self, name: str, airable_radio_id: int) -> None:
-        """Play an airable radio station."""
-        await self.request(
-            ep.STREAM_RADIO,
-            params={
-                "zone": "ZONE1",
-                "airable_radio_id": airable_radio_id,
-                "name": name,
-            },
-        )
-
-    async def play_radio_url(self, name: str, url: str) -> None:
-        """Play a radio station from a provided url."""
-        await self.request(
-            ep.STREAM_RADIO, params={"zone": "ZONE1", "url": url, "name": name}
-        )
-
-    async def set_audio_output(self, output_id: str) -> None:
-        """Set the audio output of the device."""
-        await self.request(
-            ep.ZONE_AUDIO_OUTPUT, params={"zone": "ZONE1", "id": output_id}
-        )
-
     async def set_pre_amp_mode(self, enabled: bool) -> None:
         """Sets whether the internal pre-amp is enabled."""
         await self.request(ep.ZONE_STATE, params={"pre_amp_mode": enabled})
 
-    async def set_equalizer_mode(self, enabled: bool) -> None:
-        """Sets whether the internal equalizer is enabled."""
-        if self.audio.user_eq is None:
-            raise StreamMagicError("Equalizer is not supported on this device")
-        await self.request(ep.AUDIO, params={"zone": "ZONE1", "user_eq": enabled})
-
-    async def set_equalizer_band_filter(
-        self, band_index: int, filter_type: EQFilterType
-    ) -> None:
-        """Sets the filter type for a specific equalizer band."""
-        if self.audio.user_eq is None:
-            raise StreamMagicError("Equalizer is not supported on this device")
-        band = EQBand(index=band_index, filter=filter_type)
-        await self.set_equalizer_params([band])
-
-    async def set_equalizer_band_frequency(
-        self, band_index: int, frequency: int
-    ) -> None:
-        """Sets the frequency for a specific equalizer band."""
-        if self.audio.user_eq is None:
-            raise StreamMagicError("Equalizer is not supported on this device")
-        if not 20 <= frequency <= 20000:
-            raise StreamMagicError("Frequency must be between 20 Hz and 20 kHz")
-        band = EQBand(index=band_index, freq=frequency)
-        await self.set_equalizer_params([band])
-
-    async def set_equalizer_band_gain(self, band_index: int, gain: float) -> None:
-        """Sets the gain for a specific equalizer band."""
-        if self.audio.user_eq is None:
-            raise StreamMagicError("Equalizer is not supported on this device")
-        if not -6 <= gain <= 3:
-            raise StreamMagicError("Gain must be between -6 dB and 3 dB")
-        band = EQBand(index=band_index, gain=gain)
-        await self.set_equalizer_params([band])
-
-    async def set_equalizer_band_q_factor(self, band_index: int, q: float) -> None:
-        """Sets the Q factor for a specific equalizer band."""
-        if self.audio.user_eq is None:
-            raise StreamMagicError("Equalizer is not supported on this device")
-        if not 0.1 <= q <= 10:
-            raise StreamMagicError("Q factor must be between 0.1 and 10")
-        band = EQBand(index=band_index, q=q)
-        await self.set_equalizer_params([band])
-
-    async def set_equalizer_defaults(self) -> None:
-        """Sets the equalizer to the default settings."""
-        if self.audio.user_eq is None:
-            raise StreamMagicError("Equalizer is not supported on this device")
-        bands = [
-            EQBand(index=0, filter=EQFilterType.LOWSHELF, freq=80, gain=0.0, q=0.8),
-            EQBand(index=1, filter=EQFilterType.PEAKING, freq=120, gain=0.0, q=1.24),
-            EQBand(index=2, filter=EQFilterType.PEAKING, freq=315, gain=0.0, q=1.24),
-            EQBand(index=3, filter=EQFilterType.PEAKING, freq=800, gain=0.0, q=1.24),
-            EQBand(index=4, filter=EQFilterType.PEAKING, freq=2000, gain=0.0, q=1.24),
-            EQBand(index=5, filter=EQFilterType.PEAKING, freq=5000, gain=0.0, q=1.24),
-            EQBand(index=6, filter=EQFilterType.HIGHSHELF, freq=8000, gain=0.0, q=0.8),
-        ]
-        await self.set_equalizer_params(bands)
-
-    async def set_equalizer_preset(self, eq_preset_name: str) -> None:
-        """Sets the equalizer to a preset configuration."""
-        if self.audio.user_eq is None:
-            raise StreamMagicError("Equalizer is not supported on this device")
-        if eq_preset_name not in EQ_PRESETS:
-            available = ", ".join(sorted(EQ_PRESETS.keys()))
-            raise StreamMagicError(
-                f"Unknown preset '{eq_preset_name}'. Available presets: {available}"
-            )
-        gains = EQ_PRESETS[eq_preset_name]
-        bands = [EQBand(index=i, gain=gain) for i, gain in enumerate(gains)]
-        await self.set_equalizer_params(bands)
-
-    async def set_equalizer_params(self, bands: list[EQBand]) -> None:
-        """Sets the internal equalizer to the provided band settings"""
-        if self.audio.user_eq is None:
-            raise StreamMagicError("Equalizer is not supported on this device")
-        await self.request(
-            ep.AUDIO,
-            params={"zone": "ZONE1", "user_eq_bands": eq_bands_to_param_string(bands)},
-        )
-
-    async def set_room_correction_mode(self, enabled: bool) -> None:
-        """Sets whether the internal room correction is enabled."""
-        if self.audio.tilt_eq is None:
-            raise StreamMagicError("Room correction is not supported on this device")
-        await self.request(ep.AUDIO, params={"zone": "ZONE1", "tilt_eq": enabled})
-
-    async def set_room_correction_intensity(self, intensity: int) -> None:
-        """Sets the intensity of the room correction."""
-        if self.audio.tilt_eq is None:
-            raise StreamMagicError("Room correction is not supported on this device")
-        if not -15 <= intensity <= 15:
-            raise StreamMagicError("Intensity must be between -15 and 15")
-        await self.request(
-            ep.AUDIO, params={"zone": "ZONE1", "tilt_intensity": intensity}
-        )
-
-    async def set_balance(self, balance: int) -> None:
-        """Sets the balance for the internal pre-amp of the device."""
-        if self.audio.balance is None:
-            raise StreamMagicError("Balance is not supported on this device")
-        if not -15 <= balance <= 15:
-            raise StreamMagicError("Balance must be between -15 and 15")
-        await self.request(ep.AUDIO, params={"zone": "ZONE1", "balance": balance})
-
     async def set_volume_limit(self, volume_limit_percent: int) -> None:
         """Sets the volume limit for the internal pre-amp. Value must be between 1 and 100."""
         if not 1 <= volume_limit_percent <= 100:
@@ -831,10 +1162,6 @@ class StreamMagicClient:
             ep.UPDATE, params={"early_update": early_update, "action": "CHECK"}
         )
 
-    async def recall_preset(self, preset: int) -> None:
-        """Recall a preset for the device."""
-        await self.request(ep.RECALL_PRESET, params={"preset": preset, "zone": "ZONE1"})
-
     async def set_control_bus_mode(self, control_bus: ControlBusMode) -> None:
         """Set the control bus mode."""
         await self.request(ep.ZONE_STATE, params={"cbus": control_bus})
@@ -849,6 +1176,99 @@ class StreamMagicClient:
             ep.POWER, params={"auto_power_down": auto_power_down_time_seconds}
         )
 
+    def _check_scene(self, scene: Scene) -> None:
+        """Raise if a scene has a field the device does not support or a bad value."""
+        if scene.volume_percent is not None and not 0 <= scene.volume_percent <= 100:
+            raise StreamMagicError("Volume must be between 0 and 100")
+        if (
+            scene.eq_bands is None
+            and scene.tilt_eq_intensity is None
+            and scene.balance is None
+        ):
+            return
+        audio = self.audio
+        if scene.eq_bands is not None and audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        if scene.tilt_eq_intensity is not None:
+            if audio.tilt_eq is None:
+                raise StreamMagicError(
+                    "Room correction is not supported on this device"
+                )
+            if not -15 <= scene.tilt_eq_intensity <= 15:
+                raise StreamMagicError("Intensity must be between -15 and 15")
+        if scene.balance is not None:
+            if audio.balance is None:
+                raise StreamMagicError("Balance is not supported on this device")
+            if not -15 <= scene.balance <= 15:
+                raise StreamMagicError("Balance must be between -15 and 15")
+
+    async def apply_scene(self, scene: Scene) -> list[str]:
+        """Apply a scene, sending only the commands whose values differ.
+
+        The whole scene is checked first, so a scene with a field the device
+        does not support raises StreamMagicError before any command is sent.
+        Power is applied before the source, and the source before the remaining
+        settings, which are sent in parallel. Returns the names of the scene
+        fields that were changed.
+        """
+        self._check_scene(scene)
+        state = self.state
+        changed: list[str] = []
+        if scene.power is not None and scene.power != state.power:
+            await (self.power_on() if scene.power else self.power_off())
+            changed.append("power")
+        if scene.power is False:
+            return changed
+        if scene.source is not None and scene.source != state.source:
+            await self.set_source_by_id(scene.source)
+            changed.append("source")
+
+        commands: dict[str, Awaitable[None]] = {}
+        if (
+            scene.volume_percent is not None
+            and scene.volume_percent != state.volume_percent
+        ):
+            commands["volume_percent"] = self.set_volume(scene.volume_percent)
+        if scene.mute is not None and scene.mute != state.mute:
+            commands["mute"] = self.set_mute(scene.mute)
+        if scene.audio_output is not None and scene.audio_output != state.audio_output:
+            commands["audio_output"] = self.set_audio_output(scene.audio_output)
+        # Checked by _check_scene: audio is cached when the scene sets any of
+        # these fields, and the device supports them.
+        audio = self._audio
+        if (
+            scene.eq_bands is not None
+            and audio
+            and audio.user_eq
+            and (bands := eq_bands_diff(audio.user_eq.bands, scene.eq_bands))
+        ):
+            commands["eq_bands"] = self.set_equalizer_params(bands)
+        if (
+            scene.tilt_eq_intensity is not None
+            and audio
+            and audio.tilt_eq
+            and scene.tilt_eq_intensity != audio.tilt_eq.intensity
+        ):
+            commands["tilt_eq_intensity"] = self.set_room_correction_intensity(
+                scene.tilt_eq_intensity
+            )
+        if scene.balance is not None and audio and scene.balance != audio.balance:
+            commands["balance"] = self.set_balance(scene.balance)
+        if scene.display_brightness is not None and (
+            self._display is None
+            or scene.display_brightness != self._display.brightness
+        ):
+            commands["display_brightness"] = self.set_display_brightness(
+                scene.display_brightness
+            )
+
+        results = await asyncio.gather(*commands.values(), return_exceptions=True)
+        changed.extend(commands)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return changed
+
     async def __aenter__(self) -> "StreamMagicClient":
         await self.connect()
         return self
@@ -0,0 +1,241 @@
+"""Thread-safe access to a StreamMagic client for code without an event loop."""
+
+import asyncio
+import inspect
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Coroutine, Optional
+
+from aiostreammagic.exceptions import StreamMagicError
+from aiostreammagic.models import (
+    Audio,
+    AudioOutput,
+    CallbackType,
+    Display,
+    Info,
+    NowPlaying,
+    PlayState,
+    PresetList,
+    Source,
+    State,
+    Update,
+)
+from aiostreammagic.snapshot import DeviceSnapshot
+from aiostreammagic.stream_magic import StreamMagicClient
+
+
+class StreamMagicThreadedClient:
+    """Run a StreamMagicClient on a background event loop for threaded callers.
+
+    Client coroutines are exposed as blocking methods that any thread may call,
+    for example ``client.set_volume(30)``, or submitted without blocking with
+    submit(). State properties are served from a snapshot that is replaced on
+    the event loop thread after every update, so reading them never waits for
+    the loop. Other client attributes, such as rtt and health, are read on the
+    event loop thread, and other methods run there.
+    """
+
+    def __init__(self, host: str, **client_options: Any) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name=f"aiostreammagic-{host}", daemon=True
+        )
+        self._thread.start()
+        self.client: StreamMagicClient = self._run(
+            self._async_create(host, client_options)
+        )
+
+    async def _async_create(
+        self, host: str, client_options: dict[str, Any]
+    ) -> StreamMagicClient:
+        client = StreamMagicClient(host, **client_options)
+        self._snapshot = client.snapshot
+        await client.register_state_update_callbacks(self._async_update_snapshot)
+        return client
+
+    async def _async_update_snapshot(
+        self, client: StreamMagicClient, callback_type: CallbackType
+    ) -> None:
+        """Capture the state of the client, called on the event loop thread."""
+        self._snapshot = client.snapshot
+
+    def _run(
+        self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None
+    ) -> Any:
+        """Run a coroutine on the event loop and wait for its result."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise StreamMagicError("Blocking calls cannot be made from the event loop")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def submit(self, method: str, *args: Any, **kwargs: Any) -> "Future[Any]":
+        """Schedule a client coroutine method and return a future for its result."""
+        return asyncio.run_coroutine_threadsafe(
+            self._coroutine_method(method)(*args, **kwargs), self._loop
+        )
+
+    def _class_attribute(self, name: str) -> Any:
+        """Look up a public client attribute on the class, without evaluating it."""
+        if name.startswith("_"):
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        return getattr(type(self.client), name, None)
+
+    def _coroutine_method(self, name: str) -> Callable[..., Coroutine[Any, Any, Any]]:
+        if not inspect.iscoroutinefunction(self._class_attribute(name)):
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        method: Callable[..., Coroutine[Any, Any, Any]] = getattr(self.client, name)
+        return method
+
+    def _client_attribute(self, name: str) -> Any:
+        """Read a client attribute, called on the event loop thread."""
+        try:
+            return getattr(self.client, name)
+        except AttributeError:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            ) from None
+
+    async def _async_getattr(self, name: str) -> Any:
+        return self._client_attribute(name)
+
+    async def _async_call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        """Call a client method on the event loop thread."""
+        return getattr(self.client, name)(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        """Expose the rest of the client, run on the event loop thread.
+
+        Coroutine methods and other methods become blocking methods. Any other
+        attribute, including properties, is read on the event loop thread.
+        """
+        if name == "client":
+            raise AttributeError(name)
+        attr = self._class_attribute(name)
+        if inspect.iscoroutinefunction(attr):
+            method = self._coroutine_method(name)
+
+            def call(*args: Any, **kwargs: Any) -> Any:
+                return self._run(method(*args, **kwargs))
+
+        elif inspect.isfunction(attr):
+
+            def call(*args: Any, **kwargs: Any) -> Any:
+                return self._run(self._async_call(name, *args, **kwargs))
+
+        elif threading.current_thread() is self._thread:
+            return self._client_attribute(name)
+        else:
+            return self._run(self._async_getattr(name))
+
+        call.__name__ = name
+        call.__doc__ = attr.__doc__
+        return call
+
+    def connect(self, timeout: Optional[float] = None) -> Any:
+        """Connect to the device and wait until the connection is ready."""
+        return self._run(self.client.connect(), timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Disconnect from the device and stop the background event loop."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._run(self.client.disconnect(), timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._loop.close()
+
+    def __enter__(self) -> "StreamMagicThreadedClient":
+        self.connect()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: object | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def snapshot(self) -> DeviceSnapshot:
+        """Return the snapshot of the client taken at the last update."""
+        return self._snapshot
+
+    def is_connected(self) -> bool:
+        """Return True if the device was connected at the last update."""
+        return self._snapshot.connected
+
+    @property
+    def info(self) -> Info:
+        """Return the device information."""
+        if self._snapshot.info is None:
+            raise StreamMagicError("Info not available.")
+        return self._snapshot.info
+
+    @property
+    def sources(self) -> tuple[Source, ...]:
+        """Return the sources of the device."""
+        return self._snapshot.sources
+
+    @property
+    def state(self) -> State:
+        """Return the state of the main zone."""
+        if self._snapshot.state is None:
+            raise StreamMagicError("State not available.")
+        return self._snapshot.state
+
+    @property
+    def play_state(self) -> PlayState:
+        """Return the play state of the main zone."""
+        if self._snapshot.play_state is None:
+            raise StreamMagicError("Play state not available.")
+        return self._snapshot.play_state
+
+    @property
+    def now_playing(self) -> NowPlaying:
+        """Return the now playing information of the main zone."""
+        if self._snapshot.now_playing is None:
+            raise StreamMagicError("NowPlaying not available.")
+        return self._snapshot.now_playing
+
+    @property
+    def audio(self) -> Audio:
+        """Return the audio settings of the main zone."""
+        if self._snapshot.audio is None:
+            raise StreamMagicError("Audio not available.")
+        return self._snapshot.audio
+
+    @property
+    def audio_output(self) -> AudioOutput:
+        """Return the audio outputs of the main zone."""
+        if self._snapshot.audio_output is None:
+            raise StreamMagicError("AudioOutput not available.")
+        return self._snapshot.audio_output
+
+    @property
+    def display(self) -> Display:
+        """Return the display settings of the device."""
+        if self._snapshot.display is None:
+            raise StreamMagicError("Display not available.")
+        return self._snapshot.display
+
+    @property
+    def update(self) -> Update:
+        """Return the update information of the device."""
+        if self._snapshot.update is None:
+            raise StreamMagicError("Update not available.")
+        return self._snapshot.update
+
+    @property
+    def preset_list(self) -> PresetList:
+        """Return the presets of the device."""
+        if self._snapshot.preset_list is None:
+            raise StreamMagicError("PresetList not available.")
+        return self._snapshot.preset_list
@@ -1,9 +1,25 @@
 """Utility functions for StreamMagic."""
 
-from typing import Optional
+from dataclasses import replace
+from typing import Any, Generic, Optional, TypeVar, overload
+
+from mashumaro import DataClassDictMixin
 
 from aiostreammagic.models import EQBand
 
+T = TypeVar("T", bound=DataClassDictMixin)
+
+
+_EQ_FLOAT_FORMATS = {"gain": "{:.1f}", "q": "{:.2f}"}
+
+
+def _format_eq_value(val: object, float_fmt: Optional[str] = None) -> str:
+    if val is None:
+        return ""
+    if float_fmt and isinstance(val, (int, float)):
+        return float_fmt.format(val)
+    return str(val)
+
 
 def eq_bands_to_param_string(bands: list[EQBand]) -> str:
     """Format EQ bands as required by the API.
@@ -15,15 +31,103 @@ def eq_bands_to_param_string(bands: list[EQBand]) -> str:
         Pipe-separated string of band parameters in format:
         "index,filter,freq,gain,q|index,filter,freq,gain,q|..."
     """
-
-    def fmt(val: object, float_fmt: Optional[str] = None) -> str:
-        if val is None:
-            return ""
-        if float_fmt and isinstance(val, float):
-            return float_fmt.format(val)
-        return str(val)
-
+    fmt = _format_eq_value
     return "|".join(
-        f"{fmt(band.index)},{fmt(band.filter)},{fmt(band.freq)},{fmt(band.gain, '{:.1f}')},{fmt(band.q, '{:.2f}')}"
+        f"{fmt(band.index)},{fmt(band.filter)},{fmt(band.freq)},{fmt(band.gain, _EQ_FLOAT_FORMATS['gain'])},{fmt(band.q, _EQ_FLOAT_FORMATS['q'])}"
         for band in bands
     )
+
+
+def eq_bands_diff(current: list[EQBand], target: list[EQBand]) -> list[EQBand]:
+    """Reduce target bands to the fields that differ from the current bands.
+
+    Fields are compared at the precision used by eq_bands_to_param_string.
+
+    Args:
+        current: Bands currently set on the device
+        target: Bands to set, with fields left as None to keep them unchanged
+
+    Returns:
+        Bands holding only the changed fields, omitting bands without changes
+    """
+    bands = {band.index: band for band in current}
+    diff = []
+    for band in target:
+        existing = bands.get(band.index)
+        changes = {}
+        for field in ("filter", "freq", "gain", "q"):
+            value = getattr(band, field)
+            if value is None:
+                continue
+            float_fmt = _EQ_FLOAT_FORMATS.get(field)
+            if existing is None or _format_eq_value(
+                getattr(existing, field), float_fmt
+            ) != _format_eq_value(value, float_fmt):
+                changes[field] = value
+        if changes:
+            diff.append(EQBand(index=band.index, **changes))
+    return diff
+
+
+def eq_bands_merge(current: list[EQBand], changes: list[EQBand]) -> list[EQBand]:
+    """Apply band changes to the current bands.
+
+    Args:
+        current: Bands currently set on the device
+        changes: Bands with the fields to change, fields left as None are kept
+
+    Returns:
+        New list of bands, ordered by index
+    """
+    bands = {band.index: band for band in current}
+    for band in changes:
+        fields = {
+            field: value
+            for field in ("filter", "freq", "gain", "q")
+            if (value := getattr(band, field)) is not None
+        }
+        existing = bands.get(band.index)
+        bands[band.index] = replace(existing, **fields) if existing else band
+    return [bands[index] for index in sorted(bands)]
+
+
+class RawData:
+    """Model data received from the device that has not been decoded yet."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        self.data = data
+
+
+class LazyModel(Generic[T]):
+    """Attribute holding a model that is decoded from raw data on first access."""
+
+    def __init__(self, model: type[T]) -> None:
+        self.model = model
+        self.name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    @overload
+    def __get__(self, obj: None, owner: type) -> "LazyModel[T]": ...
+
+    @overload
+    def __get__(self, obj: object, owner: type) -> T | None: ...
+
+    def __get__(self, obj: object | None, owner: type) -> "LazyModel[T] | T | None":
+        if obj is None:
+            return self
+        value = obj.__dict__.get(self.name)
+        if isinstance(value, RawData):
+            value = self.model.from_dict(value.data)
+            obj.__dict__[self.name] = value
+        return value
+
+    def __set__(self, obj: object, value: T | RawData | None) -> None:
+        obj.__dict__[self.name] = value
+
+    def raw(self, obj: object) -> T | RawData | None:
+        """Return the model of an object, or its data if not decoded yet."""
+        return obj.__dict__.get(self.name)
@@ -0,0 +1,66 @@
+"""Counters of the websocket traffic of a StreamMagic client."""
+
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class WireCounter:
+    """Number of frames and payload bytes."""
+
+    frames: int = 0
+    bytes: int = 0
+
+    def add(self, size: int) -> None:
+        """Count one frame of a payload size."""
+        self.frames += 1
+        self.bytes += size
+
+
+class WireStats:
+    """Frames and payload bytes sent and received, in total and per path.
+
+    Sizes are of the uncompressed JSON payload, received text frames are
+    counted in characters. With compression negotiated fewer bytes cross the
+    network, the saving depends on the payload.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all counters."""
+        self.sent = WireCounter()
+        self.received = WireCounter()
+        self.sent_paths: dict[str, WireCounter] = {}
+        self.received_paths: dict[str, WireCounter] = {}
+
+    def add_sent(self, path: str, size: int) -> None:
+        """Count a frame sent on a path."""
+        self.sent.add(size)
+        counter = self.sent_paths.get(path)
+        if counter is None:
+            counter = self.sent_paths[path] = WireCounter()
+        counter.add(size)
+
+    def add_received(self, path: str, size: int) -> None:
+        """Count a frame received on a path."""
+        self.received.add(size)
+        counter = self.received_paths.get(path)
+        if counter is None:
+            counter = self.received_paths[path] = WireCounter()
+        counter.add(size)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters as a dict of plain values."""
+        return {
+            "sent": vars(self.sent).copy(),
+            "received": vars(self.received).copy(),
+            "sent_paths": {
+                path: vars(counter).copy() for path, counter in self.sent_paths.items()
+            },
+            "received_paths": {
+                path: vars(counter).copy()
+                for path, counter in self.received_paths.items()
+            },
+        }
@@ -0,0 +1,912 @@
+"""Zone handling for StreamMagic devices."""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from datetime import datetime, UTC
+from typing import Any, Awaitable, Callable, Coroutine, Optional, TYPE_CHECKING, TypeVar
+
+from aiostreammagic.const import RAMP_MAX_RATE
+from aiostreammagic.diagnostics import current_trace
+from aiostreammagic.exceptions import StreamMagicError
+from aiostreammagic.history import StateHistory
+from aiostreammagic.models import (
+    Source,
+    State,
+    PlayState,
+    NowPlaying,
+    ShuffleMode,
+    RepeatMode,
+    CallbackType,
+    CommandPriority,
+    AudioOutput,
+    Audio,
+    EQBand,
+    EQFilterType,
+    EQ_PRESETS,
+    DEFAULT_EQ_BANDS,
+    TransportControl,
+)
+from aiostreammagic.snapshot import DeviceSnapshot
+from aiostreammagic.util import (
+    eq_bands_diff,
+    eq_bands_merge,
+    eq_bands_to_param_string,
+    LazyModel,
+    RawData,
+    T,
+)
+from . import endpoints as ep
+
+if TYPE_CHECKING:
+    from aiostreammagic.stream_magic import StreamMagicClient
+
+M = TypeVar("M")
+
+
+@dataclass
+class PendingChange:
+    """An optimistically applied change awaiting confirmation from the device."""
+
+    expected: Any
+    previous: Any
+    settled: bool = False
+
+
+class BaseZone(ABC):
+    """Cached state and commands for a single zone of a StreamMagic device."""
+
+    zone_id: str
+    available: bool
+    state_update_callbacks: list[Any]
+    position_last_updated: datetime
+    _allow_state_update: bool
+    _subscriptions: dict[str, Any]
+    _raw_models: bool
+    _optimistic: bool
+    _pending: dict[str, dict[str, PendingChange]]
+    _cache_max_age: float | None
+    _topic_updated: dict[str, float]
+    _ramps: dict[str, asyncio.Task[None]]
+    _snapshot: Optional[DeviceSnapshot]
+    _snapshot_parts: tuple[Any, ...]
+    history: Optional[StateHistory]
+    _state = LazyModel(State)
+    _play_state = LazyModel(PlayState)
+    _now_playing = LazyModel(NowPlaying)
+    _audio = LazyModel(Audio)
+    _audio_output = LazyModel(AudioOutput)
+
+    def _init_zone(
+        self,
+        zone_id: str,
+        raw_models: bool = False,
+        optimistic: bool = False,
+        cache_max_age: float | None = None,
+        history_size: int | None = None,
+    ) -> None:
+        """Initialize the cached zone state."""
+        self.zone_id = zone_id
+        self.available = True
+        self._raw_models = raw_models
+        self._optimistic = optimistic
+        self._pending = {}
+        self._cache_max_age = cache_max_age
+        self._topic_updated = {}
+        self._ramps = {}
+        self._snapshot = None
+        self._snapshot_parts = ()
+        self.history = StateHistory(history_size) if history_size else None
+        self.state_update_callbacks = []
+        self.position_last_updated = datetime.now()
+        self._allow_state_update = False
+        self._subscriptions = {}
+        self._state = None
+        self._play_state = None
+        self._now_playing = None
+        self._audio = None
+        self._audio_output = None
+
+    @abstractmethod
+    async def request(
+        self,
+        path: str,
+        params: Optional[dict[str, str | int | float | bool]] = None,
+        priority: Optional[CommandPriority] = None,
+    ) -> Any:
+        """Send a request to the device and return the response."""
+
+    @abstractmethod
+    def is_connected(self) -> bool:
+        """Return True if device is connected."""
+
+    @property
+    @abstractmethod
+    def is_stale(self) -> bool:
+        """Return True if nothing has been received from the device recently."""
+
+    @abstractmethod
+    def _device(self) -> "StreamMagicClient":
+        """Return the client holding the device wide state of this zone."""
+
+    @property
+    def snapshot(self) -> DeviceSnapshot:
+        """Return an immutable, versioned view of the zone and device state.
+
+        This decodes all models that are still raw data.
+        """
+        device = self._device()
+        parts = (
+            self.is_connected(),
+            self.position_last_updated,
+            device._info,
+            device.sources,
+            self._state,
+            self._play_state,
+            self._now_playing,
+            self._audio,
+            self._audio_output,
+            device._display,
+            device._update,
+            device._preset_list,
+        )
+        snapshot = self._snapshot
+        if snapshot is not None and all(
+            part is previous for part, previous in zip(parts, self._snapshot_parts)
+        ):
+            return snapshot
+        snapshot = DeviceSnapshot(
+            version=snapshot.version + 1 if snapshot else 1,
+            zone_id=self.zone_id,
+            connected=parts[0],
+            position_last_updated=self.position_last_updated,
+            info=device._info,
+            sources=tuple(device.sources),
+            state=self._state,
+            play_state=self._play_state,
+            now_playing=self._now_playing,
+            audio=self._audio,
+            audio_output=self._audio_output,
+            display=device._display,
+            update=device._update,
+            preset_list=device._preset_list,
+        )
+        self._snapshot = snapshot
+        self._snapshot_parts = parts
+        return snapshot
+
+    def _cached(self, path: str, model: M | None, force: bool = False) -> M | None:
+        """Return the cached model if its subscription keeps it fresh enough."""
+        if force or model is None or self._cache_max_age is None:
+            return None
+        updated = self._topic_updated.get(path)
+        if updated is None or path not in self._subscriptions or self.is_stale:
+            return None
+        if time.monotonic() - updated > self._cache_max_age:
+            return None
+        return model
+
+    def _store(self, path: str, attr: str, model: M) -> M:
+        """Cache a model fetched from the device, it is as fresh as a push."""
+        if self._cache_max_age is not None:
+            setattr(self, attr, self._reconcile(attr, model))
+            self._topic_updated[path] = time.monotonic()
+        return model
+
+    def _decode(self, model: type[T], data: dict[str, Any]) -> T | RawData:
+        """Decode model data, deferring it until first access in raw mode."""
+        if self._raw_models:
+            return RawData(data)
+        return model.from_dict(data)
+
+    def _reconcile(self, attr: str, model: T | RawData) -> T | RawData:
+        """Reconcile a model pushed by the device with pending optimistic changes."""
+        pending = self._pending.get(attr)
+        if not pending:
+            return model
+        if isinstance(model, RawData):
+            model = getattr(type(self), attr).model.from_dict(model.data)
+        overlay = {}
+        for field, change in list(pending.items()):
+            value = getattr(model, field)
+            if value == change.expected or change.settled:
+                del pending[field]
+            else:
+                change.previous = value
+                overlay[field] = change.expected
+        return replace(model, **overlay) if overlay else model  # type: ignore[type-var]
+
+    async def _optimistic_request(
+        self,
+        path: str,
+        params: dict[str, str | int | float | bool],
+        attr: str,
+        changes: dict[str, Any],
+    ) -> None:
+        """Send a request, applying its expected effect to the cached model first.
+
+        The change stays pending until a push from the device confirms it and is
+        rolled back if the device rejects the request.
+        """
+        model = getattr(self, attr)
+        if not self._optimistic or model is None:
+            await self.request(path, params)
+            return
+
+        pending = self._pending.setdefault(attr, {})
+        applied = {}
+        for field, value in changes.items():
+            previous = (
+                pending[field].previous if field in pending else getattr(model, field)
+            )
+            applied[field] = pending[field] = PendingChange(value, previous)
+        setattr(self, attr, replace(model, **changes))
+        await self.do_state_update_callbacks()
+
+        try:
+            await self.request(path, params)
+        except (StreamMagicError, asyncio.CancelledError):
+            rollback = {}
+            for field, change in applied.items():
+                if pending.get(field) is change:
+                    del pending[field]
+                    rollback[field] = change.previous
+            if rollback and (current := getattr(self, attr)) is not None:
+                setattr(self, attr, replace(current, **rollback))
+                await self.do_state_update_callbacks()
+            raise
+        for change in applied.values():
+            change.settled = True
+
+    def _zone_topics(self) -> dict[str, Any]:
+        """Return the zone scoped subscription handlers keyed by path."""
+        return {
+            ep.ZONE_STATE: self._async_handle_zone_state,
+            ep.PLAY_STATE: self._async_handle_play_state,
+            ep.POSITION: self._async_handle_position,
+            ep.NOW_PLAYING: self._async_handle_now_playing,
+            ep.ZONE_AUDIO_OUTPUT: self._async_handle_audio_output,
+            ep.AUDIO: self._async_handle_audio,
+        }
+
+    def _zone_fetchers(self) -> dict[str, tuple[str, Callable[..., Awaitable[Any]]]]:
+        """Return the attribute and getter used to fetch each zone topic."""
+        return {
+            ep.ZONE_STATE: ("_state", self.get_state),
+            ep.PLAY_STATE: ("_play_state", self.get_play_state),
+            ep.NOW_PLAYING: ("_now_playing", self.get_now_playing),
+            ep.AUDIO: ("_audio", self.get_audio),
+            ep.ZONE_AUDIO_OUTPUT: ("_audio_output", self.get_audio_output),
+        }
+
+    async def register_state_update_callbacks(self, callback: Any) -> None:
+        """Register state update callback."""
+        self.state_update_callbacks.append(callback)
+        if self._allow_state_update:
+            await callback(self, CallbackType.STATE)
+
+    def unregister_state_update_callbacks(self, callback: Any) -> None:
+        """Unregister state update callback."""
+        if callback in self.state_update_callbacks:
+            self.state_update_callbacks.remove(callback)
+
+    def clear_state_update_callbacks(self) -> None:
+        """Clear state update callbacks."""
+        self.state_update_callbacks.clear()
+
+    async def do_state_update_callbacks(
+        self, callback_type: CallbackType = CallbackType.STATE
+    ) -> None:
+        """Call state update callbacks."""
+        if self.history is not None:
+            # Read the history fields from the raw data of lazy models, so
+            # recording does not decode them on every update.
+            self.history.observe(
+                BaseZone._state.raw(self), BaseZone._play_state.raw(self)
+            )
+        if not self.state_update_callbacks:
+            return
+        callbacks = set()
+        for callback in self.state_update_callbacks:
+            callbacks.add(callback(self, callback_type))
+
+        if callbacks:
+            start = time.perf_counter()
+            await asyncio.gather(*callbacks)
+            if (trace := current_trace.get()) is not None:
+                trace.add("callbacks", time.perf_counter() - start)
+
+    @property
+    def state(self) -> State:
+        """Return a type-guaranteed instance of State"""
+        if not self._state:
+            raise StreamMagicError("State not available.")
+        return self._state
+
+    @property
+    def play_state(self) -> PlayState:
+        """Return a type-guaranteed instance of PlayState"""
+        if not self._play_state:
+            raise StreamMagicError("Play state not available.")
+        return self._play_state
+
+    @property
+    def now_playing(self) -> NowPlaying:
+        """Return a type-guaranteed instance of NowPlaying"""
+        if not self._now_playing:
+            raise StreamMagicError("NowPlaying not available.")
+        return self._now_playing
+
+    @property
+    def audio(self) -> Audio:
+        """Return a type-guaranteed instance of Audio"""
+        if not self._audio:
+            raise StreamMagicError("Audio not available.")
+        return self._audio
+
+    @property
+    def audio_output(self) -> AudioOutput:
+        """Return a type-guaranteed instance of AudioOutput"""
+        if not self._audio_output:
+            raise StreamMagicError("AudioOutput not available.")
+        return self._audio_output
+
+    async def get_state(self, force: bool = False) -> State:
+        """Get state information from device."""
+        if (cached := self._cached(ep.ZONE_STATE, self._state, force)) is not None:
+            return cached
+        data = await self.request(ep.ZONE_STATE, {"zone": self.zone_id})
+        return self._store(
+            ep.ZONE_STATE, "_state", State.from_dict(data["params"]["data"])
+        )
+
+    async def get_play_state(self, force: bool = False) -> PlayState:
+        """Get play state information from device."""
+        if (cached := self._cached(ep.PLAY_STATE, self._play_state, force)) is not None:
+            return cached
+        data = await self.request(ep.PLAY_STATE, {"zone": self.zone_id})
+        return self._store(
+            ep.PLAY_STATE, "_play_state", PlayState.from_dict(data["params"]["data"])
+        )
+
+    async def get_now_playing(self, force: bool = False) -> NowPlaying:
+        """Get now playing information from device."""
+        if (
+            cached := self._cached(ep.NOW_PLAYING, self._now_playing, force)
+        ) is not None:
+            return cached
+        data = await self.request(ep.NOW_PLAYING, {"zone": self.zone_id})
+        return self._store(
+            ep.NOW_PLAYING, "_now_playing", NowPlaying.from_dict(data["params"]["data"])
+        )
+
+    async def get_audio(self, force: bool = False) -> Audio | None:
+        """Get audio information from device."""
+        if (cached := self._cached(ep.AUDIO, self._audio, force)) is not None:
+            return cached
+        data = await self.request(ep.AUDIO, {"zone": self.zone_id})
+        return self._store(ep.AUDIO, "_audio", Audio.from_dict(data["params"]["data"]))
+
+    async def get_audio_output(self, force: bool = False) -> AudioOutput:
+        """Get audio output information from device."""
+        if (
+            cached := self._cached(ep.ZONE_AUDIO_OUTPUT, self._audio_output, force)
+        ) is not None:
+            return cached
+        data = await self.request(ep.ZONE_AUDIO_OUTPUT, {"zone": self.zone_id})
+        return self._store(
+            ep.ZONE_AUDIO_OUTPUT,
+            "_audio_output",
+            AudioOutput.from_dict(data["params"]["data"]),
+        )
+
+    async def _async_handle_zone_state(self, payload: dict[str, Any]) -> None:
+        """Handle async zone state update."""
+        params = payload["params"]
+        if "data" in params:
+            self._state = self._reconcile("_state", self._decode(State, params["data"]))
+        await self.do_state_update_callbacks()
+
+    async def _async_handle_play_state(self, payload: dict[str, Any]) -> None:
+        """Handle async zone state update."""
+        params = payload["params"]
+        if "data" in params:
+            self._play_state = self._reconcile(
+                "_play_state", self._decode(PlayState, params["data"])
+            )
+            self.position_last_updated = datetime.now()
+        await self.do_state_update_callbacks()
+
+    async def _async_handle_position(self, payload: dict[str, Any]) -> None:
+        """Handle async position update."""
+        params = payload["params"]
+        if "data" in params and params["data"]["position"] and self._play_state:
+            # Replace the model rather than mutating it, as snapshots share it.
+            self._play_state = replace(
+                self._play_state, position=params["data"]["position"]
+            )
+            self.position_last_updated = datetime.now(UTC)
+        await self.do_state_update_callbacks()
+
+    async def _async_handle_now_playing(self, payload: dict[str, Any]) -> None:
+        """Handle async now playing update."""
+        params = payload["params"]
+        if "data" in params:
+            self._now_playing = self._decode(NowPlaying, params["data"])
+        await self.do_state_update_callbacks()
+
+    async def _async_handle_audio(self, payload: dict[str, Any]) -> None:
+        """Handle async audio update."""
+        params = payload["params"]
+        if "data" in params:
+            self._audio = self._decode(Audio, params["data"])
+        await self.do_state_update_callbacks()
+
+    async def _async_handle_audio_output(self, payload: dict[str, Any]) -> None:
+        """Handle async audio output update."""
+        params = payload["params"]
+        if "data" in params:
+            self._audio_output = self._decode(AudioOutput, params["data"])
+        await self.do_state_update_callbacks()
+
+    async def volume_up(self) -> None:
+        """Increase the volume of the device by 1."""
+        await self.request(
+            ep.ZONE_STATE, params={"zone": self.zone_id, "volume_step_change": 1}
+        )
+
+    async def volume_down(self) -> None:
+        """Increase the volume of the device by -1."""
+        await self.request(
+            ep.ZONE_STATE, params={"zone": self.zone_id, "volume_step_change": -1}
+        )
+
+    async def set_volume(self, volume: int) -> None:
+        """Set the volume of the device."""
+        if not 0 <= volume <= 100:
+            raise StreamMagicError("Volume must be between 0 and 100")
+        await self._optimistic_request(
+            ep.ZONE_STATE,
+            {"zone": self.zone_id, "volume_percent": volume},
+            "_state",
+            {"volume_percent": volume},
+        )
+
+    async def set_mute(self, mute: bool) -> None:
+        """Set the mute of the device."""
+        await self._optimistic_request(
+            ep.ZONE_STATE,
+            {"zone": self.zone_id, "mute": mute},
+            "_state",
+            {"mute": mute},
+        )
+
+    async def set_source(self, source: Source) -> None:
+        """Set the source of the device."""
+        await self.set_source_by_id(source.id)
+
+    async def set_source_by_id(self, source_id: str) -> None:
+        """Set the source of the device."""
+        await self._optimistic_request(
+            ep.ZONE_STATE,
+            {"zone": self.zone_id, "source": source_id},
+            "_state",
+            {"source": source_id},
+        )
+
+    def _check_control(self, control: TransportControl) -> None:
+        """Reject a transport control the current source does not allow.
+
+        Only checked with check_controls, against the controls in NowPlaying.
+        """
+        if not self._device()._check_controls or self._now_playing is None:
+            return
+        if control not in self._now_playing.controls:
+            raise StreamMagicError(f"{control} is not allowed by the current source")
+
+    async def media_seek(self, position: int) -> None:
+        """Set the media position of the device."""
+        self._check_control(TransportControl.SEEK)
+        await self.request(
+            ep.PLAY_CONTROL, params={"zone": self.zone_id, "position": position}
+        )
+
+    async def next_track(self) -> None:
+        """Skip the next track."""
+        self._check_control(TransportControl.TRACK_NEXT)
+        await self.request(
+            ep.PLAY_CONTROL,
+            params={"match": "none", "zone": self.zone_id, "skip_track": 1},
+        )
+
+    async def previous_track(self) -> None:
+        """Skip the next track."""
+        self._check_control(TransportControl.TRACK_PREVIOUS)
+        await self.request(
+            ep.PLAY_CONTROL,
+            params={"match": "none", "zone": self.zone_id, "skip_track": -1},
+        )
+
+    async def play_pause(self) -> None:
+        """Toggle play/pause."""
+        self._check_control(TransportControl.PLAY_PAUSE)
+        await self.request(
+            ep.PLAY_CONTROL,
+            params={"match": "none", "zone": self.zone_id, "action": "toggle"},
+        )
+
+    async def play(self) -> None:
+        """Play the device."""
+        self._check_control(TransportControl.PLAY)
+        await self._optimistic_request(
+            ep.PLAY_CONTROL,
+            {"match": "none", "zone": self.zone_id, "action": "play"},
+            "_play_state",
+            {"state": "play"},
+        )
+
+    async def pause(self) -> None:
+        """Pause the device."""
+        self._check_control(TransportControl.PAUSE)
+        await self._optimistic_request(
+            ep.PLAY_CONTROL,
+            {"match": "none", "zone": self.zone_id, "action": "pause"},
+            "_play_state",
+            {"state": "pause"},
+        )
+
+    async def stop(self) -> None:
+        """Pause the device."""
+        self._check_control(TransportControl.STOP)
+        await self.request(
+            ep.PLAY_CONTROL,
+            params={"match": "none", "zone": self.zone_id, "action": "stop"},
+        )
+
+    async def set_shuffle(self, shuffle: ShuffleMode) -> None:
+        """Set the shuffle of the device."""
+        self._check_control(TransportControl.TOGGLE_SHUFFLE)
+        params: dict[str, str | int | float | bool] = {
+            "match": "none",
+            "zone": self.zone_id,
+            "mode_shuffle": shuffle,
+        }
+        if shuffle == ShuffleMode.TOGGLE:
+            await self.request(ep.PLAY_CONTROL, params)
+            return
+        await self._optimistic_request(
+            ep.PLAY_CONTROL, params, "_play_state", {"mode_shuffle": shuffle}
+        )
+
+    async def set_repeat(self, repeat: RepeatMode) -> None:
+        """Set the repeat of the device."""
+        self._check_control(TransportControl.TOGGLE_REPEAT)
+        params: dict[str, str | int | float | bool] = {
+            "match": "none",
+            "zone": self.zone_id,
+            "mode_repeat": repeat,
+        }
+        if repeat == RepeatMode.TOGGLE:
+            await self.request(ep.PLAY_CONTROL, params)
+            return
+        await self._optimistic_request(
+            ep.PLAY_CONTROL, params, "_play_state", {"mode_repeat": repeat}
+        )
+
+    async def play_radio_airable(self, name: str, airable_radio_id: int) -> None:
+        """Play an airable radio station."""
+        await self.request(
+            ep.STREAM_RADIO,
+            params={
+                "zone": self.zone_id,
+                "airable_radio_id": airable_radio_id,
+                "name": name,
+            },
+        )
+
+    async def play_radio_url(self, name: str, url: str) -> None:
+        """Play a radio station from a provided url."""
+        await self.request(
+            ep.STREAM_RADIO, params={"zone": self.zone_id, "url": url, "name": name}
+        )
+
+    async def set_audio_output(self, output_id: str) -> None:
+        """Set the audio output of the device."""
+        await self._optimistic_request(
+            ep.ZONE_AUDIO_OUTPUT,
+            {"zone": self.zone_id, "id": output_id},
+            "_state",
+            {"audio_output": output_id},
+        )
+
+    async def set_equalizer_mode(self, enabled: bool) -> None:
+        """Sets whether the internal equalizer is enabled."""
+        if self.audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        await self.request(ep.AUDIO, params={"zone": self.zone_id, "user_eq": enabled})
+
+    async def set_equalizer_band_filter(
+        self, band_index: int, filter_type: EQFilterType
+    ) -> None:
+        """Sets the filter type for a specific equalizer band."""
+        if self.audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        band = EQBand(index=band_index, filter=filter_type)
+        await self.set_equalizer_params([band])
+
+    async def set_equalizer_band_frequency(
+        self, band_index: int, frequency: int
+    ) -> None:
+        """Sets the frequency for a specific equalizer band."""
+        if self.audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        if not 20 <= frequency <= 20000:
+            raise StreamMagicError("Frequency must be between 20 Hz and 20 kHz")
+        band = EQBand(index=band_index, freq=frequency)
+        await self.set_equalizer_params([band])
+
+    async def set_equalizer_band_gain(self, band_index: int, gain: float) -> None:
+        """Sets the gain for a specific equalizer band."""
+        if self.audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        if not -6 <= gain <= 3:
+            raise StreamMagicError("Gain must be between -6 dB and 3 dB")
+        band = EQBand(index=band_index, gain=gain)
+        await self.set_equalizer_params([band])
+
+    async def set_equalizer_band_q_factor(self, band_index: int, q: float) -> None:
+        """Sets the Q factor for a specific equalizer band."""
+        if self.audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        if not 0.1 <= q <= 10:
+            raise StreamMagicError("Q factor must be between 0.1 and 10")
+        band = EQBand(index=band_index, q=q)
+        await self.set_equalizer_params([band])
+
+    async def set_equalizer_defaults(self) -> None:
+        """Sets the equalizer to the default settings."""
+        if self.audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        await self._set_changed_equalizer_params(DEFAULT_EQ_BANDS)
+
+    async def set_equalizer_preset(self, eq_preset_name: str) -> None:
+        """Sets the equalizer to a preset configuration."""
+        if self.audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        if eq_preset_name not in EQ_PRESETS:
+            available = ", ".join(sorted(EQ_PRESETS.keys()))
+            raise StreamMagicError(
+                f"Unknown preset '{eq_preset_name}'. Available presets: {available}"
+            )
+        gains = EQ_PRESETS[eq_preset_name]
+        bands = [EQBand(index=i, gain=gain) for i, gain in enumerate(gains)]
+        await self._set_changed_equalizer_params(bands)
+
+    async def _set_changed_equalizer_params(self, bands: list[EQBand]) -> None:
+        """Send only the band settings that differ from the current equalizer."""
+        assert self.audio.user_eq is not None
+        if changed := eq_bands_diff(self.audio.user_eq.bands, bands):
+            await self.set_equalizer_params(changed)
+
+    async def set_equalizer_params(self, bands: list[EQBand]) -> None:
+        """Sets the internal equalizer to the provided band settings"""
+        if self.audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        await self.request(
+            ep.AUDIO,
+            params={
+                "zone": self.zone_id,
+                "user_eq_bands": eq_bands_to_param_string(bands),
+            },
+        )
+        # Later writes are diffed against the cached bands, which the device
+        # only updates with its next push, so apply this write to them now.
+        audio = self._audio
+        if audio is not None and audio.user_eq is not None:
+            self._audio = replace(
+                audio,
+                user_eq=replace(
+                    audio.user_eq, bands=eq_bands_merge(audio.user_eq.bands, bands)
+                ),
+            )
+
+    async def set_room_correction_mode(self, enabled: bool) -> None:
+        """Sets whether the internal room correction is enabled."""
+        if self.audio.tilt_eq is None:
+            raise StreamMagicError("Room correction is not supported on this device")
+        await self.request(ep.AUDIO, params={"zone": self.zone_id, "tilt_eq": enabled})
+
+    async def set_room_correction_intensity(self, intensity: int) -> None:
+        """Sets the intensity of the room correction."""
+        if self.audio.tilt_eq is None:
+            raise StreamMagicError("Room correction is not supported on this device")
+        if not -15 <= intensity <= 15:
+            raise StreamMagicError("Intensity must be between -15 and 15")
+        await self.request(
+            ep.AUDIO, params={"zone": self.zone_id, "tilt_intensity": intensity}
+        )
+
+    async def set_balance(self, balance: int) -> None:
+        """Sets the balance for the internal pre-amp of the device."""
+        if self.audio.balance is None:
+            raise StreamMagicError("Balance is not supported on this device")
+        if not -15 <= balance <= 15:
+            raise StreamMagicError("Balance must be between -15 and 15")
+        await self.request(ep.AUDIO, params={"zone": self.zone_id, "balance": balance})
+
+    async def recall_preset(self, preset: int) -> None:
+        """Recall a preset for the device."""
+        await self.request(
+            ep.RECALL_PRESET, params={"preset": preset, "zone": self.zone_id}
+        )
+
+    async def ramp_volume(
+        self,
+        volume: int,
+        duration: float,
+        *,
+        start: Optional[int] = None,
+        max_rate: float = RAMP_MAX_RATE,
+    ) -> None:
+        """Fade the volume to a target over a duration in seconds.
+
+        Writes are sent at most max_rate times per second, and never before
+        the previous write has been answered, so slow links get fewer steps
+        rather than a backlog. Starting another volume ramp or calling
+        cancel_ramps() stops this one at the last volume written.
+        """
+        if not 0 <= volume <= 100:
+            raise StreamMagicError("Volume must be between 0 and 100")
+        if start is not None and not 0 <= start <= 100:
+            raise StreamMagicError("Volume must be between 0 and 100")
+        first = self.state.volume_percent if start is None else start
+        if first is None:
+            raise StreamMagicError("Volume is not supported on this device")
+        last = None if start is not None else first
+
+        async def step(progress: float) -> None:
+            nonlocal last
+            value = round(first + (volume - first) * progress)
+            if value != last:
+                await self.set_volume(value)
+                last = value
+
+        await self._run_ramp("volume", self._ramp(duration, max_rate, step))
+
+    async def morph_equalizer(
+        self,
+        eq_preset_name: str,
+        duration: float,
+        *,
+        start_preset: Optional[str] = None,
+        max_rate: float = RAMP_MAX_RATE,
+    ) -> None:
+        """Gradually move the equalizer gains to a preset over a duration in seconds.
+
+        Each step sends the bands whose gain changed in a single write, paced
+        like ramp_volume(). Starting another morph or calling cancel_ramps()
+        stops this one at the last gains written.
+        """
+        if self.audio.user_eq is None:
+            raise StreamMagicError("Equalizer is not supported on this device")
+        for name in (eq_preset_name, start_preset):
+            if name is not None and name not in EQ_PRESETS:
+                available = ", ".join(sorted(EQ_PRESETS.keys()))
+                raise StreamMagicError(
+                    f"Unknown preset '{name}'. Available presets: {available}"
+                )
+        target = EQ_PRESETS[eq_preset_name]
+        if start_preset is not None:
+            first = EQ_PRESETS[start_preset]
+            last: list[Optional[float]] = [None] * len(target)
+        else:
+            current = {band.index: band.gain for band in self.audio.user_eq.bands}
+            first = [current.get(i) or 0.0 for i in range(len(target))]
+            last = [round(gain, 1) for gain in first]
+
+        async def step(progress: float) -> None:
+            gains = [round(a + (b - a) * progress, 1) for a, b in zip(first, target)]
+            changed = [
+                EQBand(index=i, gain=gain)
+                for i, gain in enumerate(gains)
+                if gain != last[i]
+            ]
+            if changed:
+                await self.set_equalizer_params(changed)
+                last[:] = gains
+
+        await self._run_ramp("equalizer", self._ramp(duration, max_rate, step))
+
+    def cancel_ramps(self) -> None:
+        """Stop all running volume ramps and equalizer morphs."""
+        for task in self._ramps.values():
+            task.cancel()
+
+    async def _run_ramp(self, key: str, ramp: Coroutine[Any, Any, None]) -> None:
+        """Run a ramp in its own task, superseding any running ramp of that kind."""
+        if (previous := self._ramps.get(key)) is not None:
+            previous.cancel()
+        task = asyncio.create_task(ramp)
+        self._ramps[key] = task
+        try:
+            await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+        finally:
+            if self._ramps.get(key) is task:
+                del self._ramps[key]
+
+    @staticmethod
+    async def _ramp(
+        duration: float,
+        max_rate: float,
+        step: Callable[[float], Awaitable[None]],
+    ) -> None:
+        """Call step with the elapsed fraction of duration until it reaches 1."""
+        if max_rate <= 0:
+            raise StreamMagicError("Ramp rate must be greater than 0")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        interval = 1.0 / max_rate
+        while True:
+            tick = loop.time()
+            progress = min((tick - started) / duration, 1.0) if duration > 0 else 1.0
+            await step(progress)
+            if progress >= 1.0:
+                return
+            await asyncio.sleep(max(0.0, tick + interval - loop.time()))
+
+
+class StreamMagicZone(BaseZone):
+    """Handle for an additional zone sharing the connection of a client."""
+
+    def __init__(self, client: "StreamMagicClient", zone_id: str) -> None:
+        self.client = client
+        self._init_zone(
+            zone_id,
+            client._raw_models,
+            client._optimistic,
+            client._cache_max_age,
+            client._history_size,
+        )
+
+    def is_connected(self) -> bool:
+        """Return True if device is connected."""
+        return self.client.is_connected()
+
+    def _device(self) -> "StreamMagicClient":
+        return self.client
+
+    @property
+    def is_stale(self) -> bool:
+        """Return True if nothing has been received from the device recently."""
+        return self.client.is_stale
+
+    async def request(
+        self,
+        path: str,
+        params: Optional[dict[str, str | int | float | bool]] = None,
+        priority: Optional[CommandPriority] = None,
+    ) -> Any:
+        """Send a request to the device over the connection of the client."""
+        return await self.client.request(path, params, priority)
+
+    async def _async_bootstrap(self) -> None:
+        """Fetch the zone state and subscribe to zone updates."""
+        self._allow_state_update = False
+        await self.client._async_fetch_topics(
+            self.client._supported(self._zone_fetchers()), self
+        )
+        await asyncio.gather(
+            *(
+                self.client.subscribe(callback, path, zone=self)
+                for path, callback in self.client._supported(
+                    self._zone_topics()
+                ).items()
+            )
+        )
+        self._allow_state_update = True
+        await self.do_state_update_callbacks(CallbackType.CONNECTION)
@@ -0,0 +1,223 @@
+"""Compare websocket traffic and client CPU time with and without compression.
+
+Starts a local simulator that pushes a preset list of 99 presets with art
+URLs and frequent play state updates, behind a TCP proxy that counts the
+bytes on the wire. The client connects through the proxy once without and
+once with permessage-deflate.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import time
+from multiprocessing.sharedctypes import Synchronized
+
+from aiohttp import web
+
+from aiostreammagic.stream_magic import StreamMagicClient
+
+PORT = 18800
+PROXY_PORT = 18801
+DURATION = 10.0
+PLAY_STATE_INTERVAL = 0.02
+PRESET_LIST_INTERVAL = 1.0
+
+PRESETS = {
+    "start": 1,
+    "end": 99,
+    "max_presets": 99,
+    "presettable": True,
+    "presets": [
+        {
+            "id": index,
+            "name": f"Radio station {index}",
+            "type": "Radio",
+            "class": "stream.radio",
+            "state": "OK",
+            "is_playing": False,
+            "art_url": f"https://images.example.com/stations/{index:04d}/logo-600x600.png",
+            "airable_radio_id": 100000 + index,
+        }
+        for index in range(1, 100)
+    ],
+}
+DATA = {
+    "/system/info": {
+        "name": "Simulator",
+        "model": "CXN100",
+        "timezone": "UTC",
+        "locale": "en",
+        "udn": "uuid:bench",
+        "unit_id": "bench",
+        "api": "1.8",
+    },
+    "/system/sources": {"sources": []},
+    "/zone/state": {
+        "source": "AIRPLAY",
+        "power": True,
+        "pre_amp_mode": False,
+        "pre_amp_state": False,
+        "volume_percent": 20,
+        "mute": False,
+    },
+    "/zone/play_state": {"state": "play", "metadata": {"title": "Song"}},
+    "/zone/play_state/position": {"position": 1},
+    "/zone/now_playing": {"controls": []},
+    "/zone/audio": {},
+    "/zone/audio/output": {"outputs": []},
+    "/system/display": {"brightness": "bright"},
+    "/system/update": {},
+    "/presets/list": PRESETS,
+}
+
+
+def play_state(position: int) -> dict[str, object]:
+    """Return a play state push as sent by a device playing a track."""
+    return {
+        "state": "play",
+        "source": {"id": "AIRPLAY", "name": "AirPlay"},
+        "position": position,
+        "metadata": {
+            "class": "stream.service.airplay",
+            "source": "AIRPLAY",
+            "name": "AirPlay",
+            "title": "A Reasonably Long Track Title (Remastered)",
+            "artist": "Some Artist feat. Another Artist",
+            "album": "The Album Name (Deluxe Edition)",
+            "art_url": "https://images.example.com/albums/0123456789/cover-600x600.jpg",
+            "duration": 245,
+            "codec": "ALAC",
+            "sample_format": "16bit",
+            "mqa": "none",
+            "signal": True,
+            "lossless": True,
+            "sample_rate": 44100,
+            "bitrate": 1411,
+        },
+    }
+
+
+async def handle_device(request: web.Request) -> web.WebSocketResponse:
+    """Answer requests and push play state and preset list updates."""
+    ws = web.WebSocketResponse(compress=True)
+    await ws.prepare(request)
+
+    def message(path: str, data: object, kind: str = "update") -> str:
+        return json.dumps(
+            {
+                "path": path,
+                "type": kind,
+                "result": 200,
+                "message": "OK",
+                "params": {"data": data},
+            }
+        )
+
+    async def push() -> None:
+        position = 0
+        next_presets = time.monotonic()
+        while not ws.closed:
+            await asyncio.sleep(PLAY_STATE_INTERVAL)
+            position += 1
+            await ws.send_str(message("/zone/play_state", play_state(position)))
+            if time.monotonic() >= next_presets:
+                next_presets += PRESET_LIST_INTERVAL
+                await ws.send_str(message("/presets/list", PRESETS))
+
+    pusher = asyncio.create_task(push())
+    async for msg in ws:
+        path = json.loads(msg.data)["path"]
+        await ws.send_str(message(path, DATA.get(path, {}), "response"))
+    pusher.cancel()
+    return ws
+
+
+async def proxy(
+    downstream: "Synchronized[int]", upstream: "Synchronized[int]"
+) -> asyncio.Server:
+    """Forward connections to the simulator, counting bytes in each direction."""
+
+    async def pipe(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        counter: "Synchronized[int]",
+    ) -> None:
+        while data := await reader.read(65536):
+            counter.value += len(data)
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    async def handle(
+        client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter
+    ) -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+        await asyncio.gather(
+            pipe(client_reader, writer, upstream),
+            pipe(reader, client_writer, downstream),
+            return_exceptions=True,
+        )
+
+    return await asyncio.start_server(handle, "127.0.0.1", PROXY_PORT)
+
+
+def run_simulator(
+    downstream: "Synchronized[int]", upstream: "Synchronized[int]"
+) -> None:
+    """Serve the simulated device and the proxy until terminated."""
+
+    async def serve() -> None:
+        app = web.Application()
+        app.router.add_get("/smoip", handle_device)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", PORT).start()
+        await proxy(downstream, upstream)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def measure(
+    compress: int, downstream: "Synchronized[int]", upstream: "Synchronized[int]"
+) -> None:
+    """Print the traffic and client CPU time of one run."""
+    client = StreamMagicClient(
+        f"127.0.0.1:{PROXY_PORT}", compress=compress, probe_interval=None
+    )
+    await client.connect()
+    client.wire_stats.reset()
+    downstream.value = upstream.value = 0
+    cpu = time.process_time()
+    await asyncio.sleep(DURATION)
+    cpu = time.process_time() - cpu
+    payload = client.wire_stats.received.bytes
+    print(
+        f"compress={compress:2d} negotiated={client.compression:2d} "
+        f"payload={payload / 1024:8.0f} KiB "
+        f"wire down={downstream.value / 1024:8.0f} KiB "
+        f"up={upstream.value / 1024:4.0f} KiB "
+        f"client cpu={cpu:.2f}s"
+    )
+    await client.disconnect()
+
+
+async def main() -> None:
+    """Benchmark entrypoint."""
+    context = multiprocessing.get_context("spawn")
+    downstream = context.Value("q", 0)
+    upstream = context.Value("q", 0)
+    simulator = context.Process(
+        target=run_simulator, args=(downstream, upstream), daemon=True
+    )
+    simulator.start()
+    await asyncio.sleep(2.0)
+    try:
+        for compress in (0, 15):
+            await measure(compress, downstream, upstream)
+    finally:
+        simulator.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+"""Compare state update throughput of a fleet with different worker counts.
+
+Starts a local simulator serving one fake device per port, each pushing a
+volume change every UPDATE_INTERVAL seconds, and counts the state changes
+received by the parent process. Extra workers only help with spare cores, so
+the core count is printed along with the results.
+
+Usage: python examples/fleet_benchmark.py [worker counts, default 1 2 4 cores]
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from aiohttp import web
+
+from aiostreammagic.fleet import StreamMagicFleet
+
+DEVICES = 200
+BASE_PORT = 18000
+UPDATE_INTERVAL = 0.05
+DURATION = 10.0
+
+STATE = {
+    "source": "AIRPLAY",
+    "power": True,
+    "pre_amp_mode": False,
+    "pre_amp_state": False,
+    "volume_percent": 20,
+    "mute": False,
+}
+DATA = {
+    "/system/info": {
+        "name": "Simulator",
+        "model": "CXN100",
+        "timezone": "UTC",
+        "locale": "en",
+        "udn": "uuid:sim",
+        "unit_id": "sim",
+        "api": "1.8",
+    },
+    "/system/sources": {"sources": []},
+    "/zone/state": STATE,
+    "/zone/play_state": {"state": "play", "metadata": {"title": "Song"}},
+    "/zone/play_state/position": {"position": 1},
+    "/zone/now_playing": {"controls": []},
+    "/zone/audio": {},
+    "/zone/audio/output": {"outputs": []},
+    "/system/display": {"brightness": "bright"},
+    "/system/update": {},
+    "/presets/list": {"presets": []},
+}
+
+
+async def handle_device(request: web.Request) -> web.WebSocketResponse:
+    """Answer requests and push a volume change at a fixed interval."""
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+
+    async def push() -> None:
+        volume = 0
+        while not ws.closed:
+            await asyncio.sleep(UPDATE_INTERVAL)
+            volume = (volume + 1) % 100
+            data = {**STATE, "volume_percent": volume}
+            await ws.send_str(
+                json.dumps(
+                    {"path": "/zone/state", "type": "update", "params": {"data": data}}
+                )
+            )
+
+    pusher = asyncio.create_task(push())
+    async for msg in ws:
+        path = json.loads(msg.data)["path"]
+        await ws.send_str(
+            json.dumps(
+                {
+                    "path": path,
+                    "type": "response",
+                    "result": 200,
+                    "message": "OK",
+                    "params": {"data": DATA.get(path, {})},
+                }
+            )
+        )
+    pusher.cancel()
+    return ws
+
+
+def run_simulator() -> None:
+    """Serve the simulated devices until terminated."""
+
+    async def serve() -> None:
+        app = web.Application()
+        app.router.add_get("/smoip", handle_device)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        for port in range(BASE_PORT, BASE_PORT + DEVICES):
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def measure(workers: int) -> float:
+    """Return the state changes per second received with a number of workers."""
+    hosts = [f"127.0.0.1:{port}" for port in range(BASE_PORT, BASE_PORT + DEVICES)]
+    received = 0
+
+    async def on_state(host: str, state: dict[str, object]) -> None:
+        nonlocal received
+        received += 1
+
+    async with StreamMagicFleet(hosts, workers=workers, probe_interval=None) as fleet:
+        await fleet.register_state_update_callbacks(on_state)
+        await asyncio.sleep(1.0)
+        received = 0
+        start = time.monotonic()
+        await asyncio.sleep(DURATION)
+        return received / (time.monotonic() - start)
+
+
+async def main(worker_counts: list[int]) -> None:
+    """Benchmark entrypoint."""
+    simulator = multiprocessing.get_context("spawn").Process(
+        target=run_simulator, daemon=True
+    )
+    simulator.start()
+    await asyncio.sleep(2.0)
+    try:
+        offered = DEVICES / UPDATE_INTERVAL
+        print(f"{os.cpu_count()} core(s)")
+        for workers in worker_counts:
+            rate = await measure(workers)
+            print(f"{workers} worker(s): {rate:,.0f} updates/s of {offered:,.0f}")
+    finally:
+        simulator.terminate()
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4, os.cpu_count() or 1]
+    asyncio.run(main(sorted(set(counts))))
@@ -0,0 +1,74 @@
+"""Measure the import time of the package and the cost of compiling models.
+
+Each measurement runs in a fresh interpreter, so nothing is cached between
+runs, and the median of all runs is printed. Measured are importing the
+package, importing the models, compiling the models the client compiles when
+it is constructed, and decoding a State update after that.
+
+Usage: python examples/import_benchmark.py [runs, default 20]
+"""
+
+import statistics
+import subprocess
+import sys
+
+SNIPPETS: dict[str, str | tuple[str, str]] = {
+    "import aiostreammagic": "import aiostreammagic",
+    "import aiostreammagic.models": "import aiostreammagic.models",
+    "compile hot models": (
+        "from aiostreammagic.models import NowPlaying, PlayState, State,"
+        " compile_models",
+        "compile_models(State, PlayState, NowPlaying)",
+    ),
+    "first State decode, compiled": (
+        "from aiostreammagic.models import NowPlaying, PlayState, State,"
+        " compile_models\n"
+        "compile_models(State, PlayState, NowPlaying)",
+        "State.from_dict(DATA)",
+    ),
+    "first State decode, lazy": (
+        "from aiostreammagic.models import State",
+        "State.from_dict(DATA)",
+    ),
+}
+STATE = {
+    "source": "AIRPLAY",
+    "power": True,
+    "pre_amp_mode": False,
+    "pre_amp_state": False,
+    "volume_percent": 20,
+    "mute": False,
+}
+TEMPLATE = """
+import time
+DATA = {state!r}
+{setup}
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def run(snippet: str | tuple[str, str]) -> float:
+    """Return the time of a statement in a fresh interpreter, in seconds."""
+    setup, statement = ("", snippet) if isinstance(snippet, str) else snippet
+    code = TEMPLATE.format(state=STATE, setup=setup, statement=statement)
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    return float(output)
+
+
+def main(runs: int) -> None:
+    """Benchmark entrypoint."""
+    print(f"median of {runs} runs, python {sys.version.split()[0]}")
+    for name, snippet in SNIPPETS.items():
+        times = [run(snippet) for _ in range(runs)]
+        print(
+            f"{name:32s} {statistics.median(times) * 1000:8.2f} ms "
+            f"(min {min(times) * 1000:.2f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,218 @@
+"""Soak test a client for leaked tasks, futures and memory.
+
+Starts a local simulator and repeatedly runs request storms, cancelled
+requests, forced socket drops and disconnect/connect cycles against one
+client. After a warm-up the number of tasks, the size of the request and
+subscription tables and the RSS of the process must stay flat, otherwise the
+soak fails.
+
+Usage: python examples/soak.py [duration in seconds, default 3600]
+"""
+
+import asyncio
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import time
+from typing import Any
+
+from aiohttp import web
+
+from aiostreammagic.stream_magic import StreamMagicClient
+
+PORT = 18765
+HOST = f"127.0.0.1:{PORT}"
+WARMUP = 60.0
+REPORT_INTERVAL = 60.0
+STORM_SIZE = 200
+# Distinct paths per storm, a leaked entry per path shows up in the table size.
+STORM_PATHS = 500
+MAX_RSS_GROWTH = 8 * 1024 * 1024
+DROP_PATH = "/soak/drop"
+
+STATE = {
+    "source": "AIRPLAY",
+    "power": True,
+    "pre_amp_mode": False,
+    "pre_amp_state": False,
+    "volume_percent": 20,
+    "mute": False,
+}
+DATA = {
+    "/system/info": {
+        "name": "Simulator",
+        "model": "CXN100",
+        "timezone": "UTC",
+        "locale": "en",
+        "udn": "uuid:soak",
+        "unit_id": "soak",
+        "api": "1.8",
+    },
+    "/system/sources": {"sources": []},
+    "/zone/state": STATE,
+    "/zone/play_state": {"state": "play", "metadata": {"title": "Song"}},
+    "/zone/play_state/position": {"position": 1},
+    "/zone/now_playing": {"controls": []},
+    "/zone/audio": {},
+    "/zone/audio/output": {"outputs": []},
+    "/system/display": {"brightness": "bright"},
+    "/system/update": {},
+    "/presets/list": {"presets": []},
+}
+
+
+async def handle_device(request: web.Request) -> web.WebSocketResponse:
+    """Answer requests, push state changes and drop the socket on request."""
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+
+    async def push() -> None:
+        while not ws.closed:
+            await asyncio.sleep(0.1)
+            data = {**STATE, "volume_percent": random.randint(0, 100)}
+            await ws.send_str(
+                json.dumps(
+                    {"path": "/zone/state", "type": "update", "params": {"data": data}}
+                )
+            )
+
+    pusher = asyncio.create_task(push())
+    async for msg in ws:
+        path = json.loads(msg.data)["path"]
+        if path == DROP_PATH:
+            await ws.close()
+            break
+        await ws.send_str(
+            json.dumps(
+                {
+                    "path": path,
+                    "type": "response",
+                    "result": 200,
+                    "message": "OK",
+                    "params": {"data": DATA.get(path, {})},
+                }
+            )
+        )
+    pusher.cancel()
+    return ws
+
+
+def run_simulator() -> None:
+    """Serve the simulated device until terminated."""
+
+    async def serve() -> None:
+        app = web.Application()
+        app.router.add_get("/smoip", handle_device)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", PORT).start()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def rss() -> int:
+    """Return the resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(client: StreamMagicClient) -> dict[str, Any]:
+    """Return the counters that must not grow while the client is idle."""
+    return {
+        "tasks": len(asyncio.all_tasks()),
+        "futures": sum(len(futures) for futures in client.futures.values()),
+        "future_paths": len(client.futures),
+        "subscription_tasks": len(client._subscription_tasks),
+        "subscription_queues": len(client._subscription_queues),
+        "rss": rss(),
+    }
+
+
+async def wait_connected(client: StreamMagicClient) -> None:
+    """Wait for the client to reconnect and finish its bootstrap."""
+    while not (client.is_connected() and client._allow_state_update):
+        await asyncio.sleep(0.05)
+
+
+async def storm(client: StreamMagicClient) -> None:
+    """Send a burst of concurrent requests on many paths."""
+    await asyncio.gather(
+        *(
+            client.request(f"/soak/{random.randrange(STORM_PATHS)}")
+            for _ in range(STORM_SIZE)
+        ),
+        return_exceptions=True,
+    )
+
+
+async def cancelled_storm(client: StreamMagicClient) -> None:
+    """Start a burst of requests and cancel them while they are in flight."""
+    tasks = [
+        asyncio.create_task(client.request(f"/soak/{random.randrange(STORM_PATHS)}"))
+        for _ in range(STORM_SIZE)
+    ]
+    await asyncio.sleep(random.uniform(0, 0.01))
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def drop(client: StreamMagicClient) -> None:
+    """Have the simulator drop the socket, with requests in flight."""
+    requests = asyncio.gather(storm(client), return_exceptions=True)
+    await client._send(DROP_PATH)
+    await requests
+    await asyncio.wait_for(wait_connected(client), 10)
+
+
+async def cycle(client: StreamMagicClient) -> None:
+    """Disconnect and connect again."""
+    await client.disconnect()
+    await client.connect()
+
+
+async def main(duration: float) -> None:
+    """Soak entrypoint."""
+    simulator = multiprocessing.get_context("spawn").Process(
+        target=run_simulator, daemon=True
+    )
+    simulator.start()
+    await asyncio.sleep(2.0)
+    client = StreamMagicClient(HOST, probe_interval=1.0)
+    actions = [storm, cancelled_storm, drop, cycle]
+    start = time.monotonic()
+    next_report = start + WARMUP
+    baseline = None
+    iterations = 0
+    try:
+        await client.connect()
+        await client.zone("ZONE2").get_state()
+        while time.monotonic() - start < duration:
+            await random.choice(actions)(client)
+            iterations += 1
+            if time.monotonic() < next_report:
+                continue
+            await asyncio.sleep(0.5)
+            counters = measure(client)
+            baseline = baseline or counters
+            print(f"{time.monotonic() - start:8.0f}s {iterations:8d} {counters}")
+            next_report += REPORT_INTERVAL
+            assert counters["futures"] == 0, "request futures leaked"
+            assert counters["future_paths"] == 0, "request table entries leaked"
+            for key in ("tasks", "subscription_tasks", "subscription_queues"):
+                assert counters[key] <= baseline[key], f"{key} grew"
+            assert counters["rss"] - baseline["rss"] < MAX_RSS_GROWTH, "RSS grew"
+    finally:
+        await client.disconnect()
+        simulator.terminate()
+    print(f"No leaks after {iterations} iterations")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 3600.0))
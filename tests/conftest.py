@@ -0,0 +1,16 @@
+"""Fixtures shared by the tests."""
+
+from collections.abc import AsyncIterator
+
+import pytest
+
+from .simulator import DeviceSimulator
+
+
+@pytest.fixture
+async def simulator() -> AsyncIterator[DeviceSimulator]:
+    """Return a running device simulator."""
+    device = DeviceSimulator()
+    await device.start()
+    yield device
+    await device.stop()
@@ -0,0 +1,229 @@
+"""Local websocket server that answers like a StreamMagic device."""
+
+import asyncio
+import copy
+import time
+from collections.abc import Callable
+from typing import Any, Optional
+
+import orjson
+import pytest
+from aiohttp import WSMsgType, web
+
+DEFAULT_ZONE = "ZONE1"
+BAND_COUNT = 7
+
+DATA: dict[str, dict[str, Any]] = {
+    "/system/info": {
+        "name": "Simulator",
+        "model": "CXN100",
+        "timezone": "UTC",
+        "locale": "en",
+        "udn": "uuid:simulator",
+        "unit_id": "simulator",
+        "api": "1.8",
+    },
+    "/system/sources": {
+        "sources": [
+            {
+                "id": source_id,
+                "name": source_id.title(),
+                "default_name": source_id.title(),
+                "nameable": False,
+                "ui_selectable": True,
+                "description": source_id.title(),
+                "description_locale": source_id.title(),
+            }
+            for source_id in ("AIRPLAY", "SPOTIFY")
+        ]
+    },
+    "/zone/state": {
+        "source": "AIRPLAY",
+        "power": True,
+        "pre_amp_mode": False,
+        "pre_amp_state": False,
+        "volume_percent": 20,
+        "mute": False,
+    },
+    "/zone/play_state": {"state": "play", "metadata": {"title": "Song"}},
+    "/zone/play_state/position": {"position": 1},
+    "/zone/now_playing": {"controls": ["play", "pause", "track_next"]},
+    "/zone/audio": {
+        "user_eq": {
+            "enabled": True,
+            "bands": [
+                {
+                    "index": index,
+                    "filter": "PEAKING",
+                    "freq": 100 * (index + 1),
+                    "gain": 0.0,
+                    "q": 1.24,
+                }
+                for index in range(BAND_COUNT)
+            ],
+        },
+        "tilt_eq": {"enabled": False, "intensity": 0},
+        "balance": 0,
+    },
+    "/zone/audio/output": {"outputs": [{"id": "speaker", "name": "Speaker"}]},
+    "/system/display": {"brightness": "bright"},
+    "/system/update": {},
+    "/presets/list": {"presets": []},
+}
+
+
+class DeviceSimulator:
+    """Serve the StreamMagic websocket API from memory.
+
+    Writes update the served data and are pushed to subscribers like the
+    device does. Requests for zones the simulator does not have are rejected,
+    paths in `fail` are answered with an error, and every received message is
+    kept in `log`.
+    """
+
+    def __init__(self, zones: tuple[str, ...] = (DEFAULT_ZONE,)) -> None:
+        self.data = copy.deepcopy(DATA)
+        self.zones = set(zones)
+        self.log: list[dict[str, Any]] = []
+        self.fail: set[str] = set()
+        self.delay = 0.0
+        self.port = 0
+        self._sockets: set[web.WebSocketResponse] = set()
+        self._subscriptions: dict[web.WebSocketResponse, set[str]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def host(self) -> str:
+        """Return the host clients connect to."""
+        return f"127.0.0.1:{self.port}"
+
+    async def start(self) -> None:
+        """Start serving, on the same port again after a restart."""
+        app = web.Application()
+        app.router.add_get("/smoip", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Close every connection and stop serving."""
+        await self.drop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def drop(self) -> None:
+        """Close every connection, clients reconnect while the server runs."""
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def push(self, path: str, data: dict[str, Any]) -> None:
+        """Update the data of a path and push it to every connection."""
+        self.data[path] = {**self.data.get(path, {}), **data}
+        for ws in list(self._sockets):
+            await self._send_update(ws, path, DEFAULT_ZONE)
+
+    def sent(self, path: str, key: str) -> list[Any]:
+        """Return the values of a parameter in the requests on a path, in order."""
+        return [
+            message["params"][key]
+            for message in self.log
+            if message["path"] == path and key in message.get("params", {})
+        ]
+
+    async def _send(self, ws: web.WebSocketResponse, message: dict[str, Any]) -> None:
+        if not ws.closed:
+            await ws.send_bytes(orjson.dumps(message))
+
+    async def _send_update(
+        self, ws: web.WebSocketResponse, path: str, zone: Optional[str]
+    ) -> None:
+        if path in self._subscriptions.get(ws, ()):
+            await self._send(
+                ws,
+                {
+                    "path": path,
+                    "type": "update",
+                    "params": {"zone": zone, "data": self.data[path]},
+                },
+            )
+
+    async def _respond(
+        self,
+        ws: web.WebSocketResponse,
+        path: str,
+        result: int = 200,
+        message: str = "OK",
+        data: Optional[dict[str, Any]] = None,
+    ) -> None:
+        params = {} if data is None else {"data": data}
+        await self._send(
+            ws,
+            {
+                "path": path,
+                "type": "response",
+                "result": result,
+                "message": message,
+                "params": params,
+            },
+        )
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        self._subscriptions[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    await self._handle_message(ws, orjson.loads(msg.data))
+        finally:
+            self._sockets.discard(ws)
+            self._subscriptions.pop(ws, None)
+        return ws
+
+    async def _handle_message(
+        self, ws: web.WebSocketResponse, message: dict[str, Any]
+    ) -> None:
+        self.log.append(message)
+        path = message["path"]
+        params = dict(message.get("params") or {})
+        zone = params.pop("zone", None)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if zone is not None and zone not in self.zones:
+            await self._respond(ws, path, 400, "Invalid zone")
+            return
+        if path in self.fail:
+            await self._respond(ws, path, 500, "Internal error")
+            return
+        if "update" in params:
+            if params["update"]:
+                self._subscriptions[ws].add(path)
+            else:
+                self._subscriptions[ws].discard(path)
+            await self._respond(ws, path)
+            if params["update"] and path in self.data:
+                await self._send_update(ws, path, zone)
+            return
+        changes = {
+            key: value
+            for key, value in params.items()
+            if key in self.data.get(path, {})
+        }
+        if changes:
+            self.data[path] = {**self.data[path], **changes}
+        await self._respond(ws, path, data=self.data.get(path, {}))
+        if changes:
+            await self._send_update(ws, path, zone)
+
+
+async def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    """Wait until a condition is true, failing the test after the timeout."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail("Timed out waiting for the condition")
+        await asyncio.sleep(0.01)
@@ -0,0 +1,119 @@
+"""Tests of the StreamMagic client against the device simulator."""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from aiostreammagic import StreamMagicClient, StreamMagicError
+from aiostreammagic import endpoints as ep
+
+from .simulator import DeviceSimulator, wait_for
+
+
+@pytest.fixture
+async def client(simulator: DeviceSimulator) -> AsyncIterator[StreamMagicClient]:
+    """Return a client connected to the simulator."""
+    client = StreamMagicClient(simulator.host, probe_interval=None)
+    await client.connect()
+    yield client
+    await client.disconnect()
+
+
+async def test_subscription_acks_do_not_answer_requests(
+    simulator: DeviceSimulator,
+) -> None:
+    """Each request gets its own response, not the ack of a subscription."""
+    # Slow replies make the subscription acks arrive while requests wait.
+    simulator.delay = 0.01
+    client = StreamMagicClient(simulator.host, probe_interval=None)
+    await client.connect()
+    try:
+        for volume in (31, 32, 33):
+            response = await client.request(
+                ep.ZONE_STATE, {"zone": "ZONE1", "volume_percent": volume}
+            )
+            assert response["params"]["data"]["volume_percent"] == volume
+        await wait_for(lambda: not client.futures)
+    finally:
+        await client.disconnect()
+
+
+async def test_reconnect_with_rejected_zone(
+    simulator: DeviceSimulator, client: StreamMagicClient
+) -> None:
+    """A zone the device rejects is unavailable and does not fail reconnects."""
+    zone = client.zone("ZONE9")
+    await wait_for(lambda: not zone.available)
+
+    await simulator.drop()
+    await wait_for(lambda: not client.is_connected())
+    await wait_for(client.is_connected)
+
+    assert client.state.volume_percent == 20
+    assert not zone.available
+
+
+async def test_failed_standby_resume_keeps_state_updates(
+    simulator: DeviceSimulator,
+) -> None:
+    """A topic failing to refresh on power on does not stop state updates."""
+    client = StreamMagicClient(
+        simulator.host, probe_interval=None, standby_topics=ep.STANDBY_TOPICS
+    )
+    await client.connect()
+    try:
+        await simulator.push(ep.ZONE_STATE, {"power": False})
+        await wait_for(lambda: not client.state.power)
+        assert client._suspended
+
+        simulator.fail.add(ep.NOW_PLAYING)
+        await simulator.push(ep.ZONE_STATE, {"power": True})
+        await wait_for(lambda: client.state.power)
+        await wait_for(lambda: not client._suspended)
+        assert ep.NOW_PLAYING in client._subscriptions
+
+        await simulator.push(ep.ZONE_STATE, {"volume_percent": 77})
+        await wait_for(lambda: client.state.volume_percent == 77)
+    finally:
+        await client.disconnect()
+
+
+async def test_buffered_commands_are_sent_before_new_requests(
+    simulator: DeviceSimulator,
+) -> None:
+    """A request made while reconnecting is applied after buffered commands."""
+    client = StreamMagicClient(simulator.host, probe_interval=None, buffer_expiry=10)
+    await client.connect()
+    try:
+        await simulator.stop()
+        await wait_for(lambda: client.connection is None)
+        buffered = asyncio.create_task(client.set_volume(30))
+        buffer = client.command_buffer
+        assert buffer is not None
+        await wait_for(lambda: len(buffer) == 1)
+
+        simulator.log.clear()
+        simulator.delay = 0.05
+        await simulator.start()
+        await wait_for(lambda: client.connection is not None)
+        await client.set_volume(40)
+        await buffered
+
+        assert simulator.sent(ep.ZONE_STATE, "volume_percent") == [30, 40]
+        assert simulator.data[ep.ZONE_STATE]["volume_percent"] == 40
+    finally:
+        await client.disconnect()
+
+
+async def test_expired_buffered_command_fails(simulator: DeviceSimulator) -> None:
+    """Buffered commands fail once they are not sent within the expiry."""
+    client = StreamMagicClient(simulator.host, probe_interval=None, buffer_expiry=0.1)
+    await client.connect()
+    try:
+        await simulator.stop()
+        await wait_for(lambda: client.connection is None)
+        with pytest.raises(StreamMagicError):
+            await client.set_volume(30)
+    finally:
+        await client.disconnect()